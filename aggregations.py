@@ -0,0 +1,130 @@
+# aggregations.py
+"""
+Agregaciones de las pestañas (rankings, barras, resumen por dimensiones, sentimientos).
+
+Los resultados se guardan en una caché LRU a nivel de proceso, compartida por todas
+las sesiones, con la firma de filtros (ver filters.filter_signature) como clave.
+Los DataFrames devueltos son compartidos: no modificarlos en el lugar.
+"""
+import threading
+from collections import OrderedDict
+
+SENTIMENT_COL = "Sentimiento identificado"
+MAX_CACHED = 512
+
+# Valores por defecto de las pestañas de app.py. El precálculo (default_aggregates,
+# presets.py) usa los mismos para acertar en la caché: cambiarlos solo aquí.
+RANKINGS = [("Aspecto", "Top 5 Aspectos"), ("Enfoque Turístico", "Top 5 Enfoques")]
+RANKING_N = 5
+EXPLORER_DIMS = ["Departamento", "Municipio", "Aspecto", "Enfoque Turístico", "Sector"]
+BAR_COLUMNS = ["Aspecto", "Enfoque Turístico", "Municipio", "Departamento", "Sector"]  # la primera disponible es la inicial
+BAR_TOP_N = 20
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def top_counts(df, col, n=5):
+    """Ranking de los `n` valores más frecuentes de `col` con su conteo."""
+    top = df[col].value_counts().head(n).reset_index()
+    top.columns = [col, "Conteo"]
+    return top
+
+
+def category_counts(df, col, top_n):
+    """Conteo de una categoría para el gráfico de barras, ignorando valores vacíos."""
+    s = df[col].dropna().astype(str).str.strip()
+    s = s[s != ""]
+    vc = s.value_counts().head(top_n).reset_index()
+    vc.columns = [col, "Conteo"]
+    return vc
+
+
+def summary_by_dims(df, dims):
+    return df.groupby(list(dims)).size().reset_index(name="Conteo")
+
+
+def normalize_sentiment(series):
+    return series.astype(str).str.strip().str.capitalize()
+
+
+def sentiment_counts(df):
+    counts = normalize_sentiment(df[SENTIMENT_COL]).value_counts().reset_index()
+    counts.columns = [SENTIMENT_COL, "Conteo"]
+    return counts
+
+
+AGGREGATIONS = {
+    "top": top_counts,
+    "categoria": category_counts,
+    "resumen": summary_by_dims,
+    "sentimientos": sentiment_counts,
+}
+
+
+def memoize(key, compute):
+    """Devuelve el resultado cacheado bajo `key` o lo calcula con `compute()` y lo guarda."""
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = compute()
+
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return result
+
+
+def aggregate(signature, name, df, *args):
+    """
+    Calcula AGGREGATIONS[name](df, *args) una sola vez por (firma, nombre, args).
+    `df` debe ser el resultado filtrado que corresponde a `signature`.
+    """
+    return memoize((signature, name, args), lambda: AGGREGATIONS[name](df, *args))
+
+
+def entries_for(signature):
+    """Entradas cacheadas sobre `signature` (incluidas las de los filtros del explorador)."""
+    def matches(part):
+        return part == signature or (isinstance(part, tuple) and len(part) == 2 and part[0] == signature)
+
+    with _lock:
+        return {key: value for key, value in _cache.items() if any(matches(p) for p in key[:2])}
+
+
+def seed(entries):
+    """Carga resultados ya calculados (p. ej. los presets guardados en disco) en la caché."""
+    with _lock:
+        for key, value in entries.items():
+            _cache[key] = value
+            _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def default_aggregates(view):
+    """
+    Agregaciones que pinta una carga inicial sin filtros (usado por el precalentamiento).
+    `view` es la vista sin filtros de un backend (ver backends.py).
+    """
+    cols = view.columns
+    dims = [d for d in EXPLORER_DIMS if d in cols]
+    for col, _ in RANKINGS:
+        if col in cols:
+            view.top(col, RANKING_N)
+    bar_cols = [c for c in BAR_COLUMNS if c in cols]
+    if bar_cols:
+        view.category(bar_cols[0], BAR_TOP_N)
+    if dims:
+        view.explore({dim: view.distinct(dim) for dim in dims}).summary(dims)
+    if SENTIMENT_COL in cols:
+        view.sentiments()
+    return view.count()
@@ -0,0 +1,271 @@
+# api.py
+"""
+API HTTP/JSON de solo lectura sobre el consolidado, para otras herramientas internas.
+
+Usa el mismo backend que la app (backends.get_backend): el Excel se lee una sola
+vez por proceso y las agregaciones comparten la caché de aggregations.py. Con
+`python warmup.py --serve --api` corre dentro del proceso de Streamlit, sobre el
+mismo dataset en memoria que las sesiones de la app.
+
+Filtros (en todas las rutas): una o más veces cada columna del sidebar y `q` para
+la búsqueda por texto, p. ej. `?Departamento=Huila&Departamento=Tolima&q=hotel`.
+
+Rutas:
+    GET /salud                          backend, versión del dataset y filas
+    GET /facetas                        valores de cada filtro con su conteo
+    GET /conteo                         filas y departamentos del resultado filtrado
+    GET /agregaciones/top?col=Aspecto&n=5
+    GET /agregaciones/categoria?col=Municipio&n=20
+    GET /agregaciones/resumen?dims=Departamento&dims=Aspecto
+    GET /agregaciones/sentimientos
+    GET /registros?pagina=1&por_pagina=50[&formato=ndjson]
+
+Las respuestas se envían por partes (Transfer-Encoding: chunked); los registros se
+materializan de a una página.
+
+Uso:
+    python api.py [--host 127.0.0.1] [--port 8502]
+"""
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from dataset import DEFAULT_FILE, VALID_SHEETS
+from filters import FILTER_COLUMNS, available
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+MAX_PAGE_SIZE = 1000
+STREAM_ROWS = 100  # registros por parte de la respuesta
+RESERVED = {"q", "col", "n", "dims", "pagina", "por_pagina", "formato"}
+
+
+class ApiError(ValueError):
+    """Petición inválida: se responde con `status` y un JSON {"error": mensaje}."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default, minimum=1, maximum=None):
+    raw = params.get(name, [default])[-1]
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ApiError(f"'{name}' debe ser un entero.")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(f"'{name}' debe estar entre {minimum} y {maximum or '∞'}.")
+    return value
+
+
+def _column_param(vista, params, name="col"):
+    col = params.get(name, [None])[-1]
+    if not col:
+        raise ApiError(f"Falta el parámetro '{name}'.")
+    if not available(col, vista):
+        raise ApiError(f"Columna desconocida: {col}")
+    return col
+
+
+def _records(df):
+    """Filas como dicts JSON (nulos como null, nombres de columna como texto)."""
+    out = df.astype(object).where(df.notna(), None)
+    out.columns = [str(c) for c in out.columns]
+    return out.to_dict("records")
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
+
+class QueryApi:
+    """Resuelve las rutas sobre un backend; independiente del servidor HTTP (uno por petición)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def view(self, params, exclude=None):
+        """Vista con los filtros de la query string (`exclude`: columna a no filtrar)."""
+        unknown = set(params) - RESERVED - set(FILTER_COLUMNS)
+        if unknown:
+            raise ApiError(f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+        vista = self.backend.view()
+        for col in FILTER_COLUMNS:
+            if col != exclude:
+                vista = vista.filter(col, params.get(col))
+        return vista.search(params.get("q", [""])[-1])
+
+    # --- Rutas: cada una devuelve un iterable de partes de texto ---
+    def salud(self, params):
+        yield _dumps({"ok": True, "backend": self.backend.name, "dataset": self.backend.digest,
+                      "filas": self.backend.view().count()})
+
+    def conteo(self, params):
+        vista = self.view(params)
+        departamentos = vista.nunique("Departamento") if available("Departamento", vista) else None
+        yield _dumps({"filas": vista.count(), "departamentos": departamentos})
+
+    def facetas(self, params):
+        """Por columna, conteos con los demás filtros aplicados (la selección propia no se resta)."""
+        self.view(params)  # valida los parámetros antes de empezar a enviar
+        yield '{"facetas": {'
+        for i, col in enumerate(c for c in FILTER_COLUMNS if available(c, self.backend)):
+            opciones = self.backend.options(col)
+            conteos = self.view(params, exclude=col).category(col, len(opciones) or 1)
+            valores = [{"valor": v, "conteo": int(n)} for v, n in zip(conteos[col], conteos["Conteo"])]
+            yield ("," if i else "") + f"{_dumps(col)}: {_dumps(valores)}"
+        yield "}}"
+
+    def agregacion(self, name, params):
+        vista = self.view(params)
+        if name == "top":
+            df = vista.top(_column_param(vista, params), _int_param(params, "n", 5))
+        elif name == "categoria":
+            df = vista.category(_column_param(vista, params), _int_param(params, "n", 20))
+        elif name == "resumen":
+            dims = params.get("dims") or [d for d in FILTER_COLUMNS if available(d, vista)]
+            for dim in dims:
+                if not available(dim, vista):
+                    raise ApiError(f"Columna desconocida: {dim}")
+            df = vista.summary(dims)
+        elif name == "sentimientos":
+            df = vista.sentiments()
+        else:
+            raise ApiError(f"Agregación desconocida: {name}", status=404)
+        yield _dumps({"agregacion": name, "filas": _records(df)})
+
+    def registros(self, params):
+        vista = self.view(params)
+        por_pagina = _int_param(params, "por_pagina", 50, maximum=MAX_PAGE_SIZE)
+        pagina = _int_param(params, "pagina", 1)
+        ndjson = params.get("formato", ["json"])[-1] == "ndjson"
+        total = vista.count()
+        df = vista.rows((pagina - 1) * por_pagina, por_pagina)
+
+        if not ndjson:
+            yield _dumps({"total": total, "pagina": pagina, "por_pagina": por_pagina})[:-1] + ', "registros": ['
+        for start in range(0, len(df), STREAM_ROWS):
+            filas = [_dumps(r) for r in _records(df.iloc[start:start + STREAM_ROWS])]
+            if ndjson:
+                yield "".join(f + "\n" for f in filas)
+            else:
+                yield ("," if start else "") + ",".join(filas)
+        if not ndjson:
+            yield "]}"
+
+    def route(self, path, params):
+        """(content_type, partes) para la ruta pedida."""
+        parts = [p for p in path.split("/") if p]
+        if parts == ["salud"]:
+            chunks = self.salud(params)
+        elif parts == ["conteo"]:
+            chunks = self.conteo(params)
+        elif parts == ["facetas"]:
+            chunks = self.facetas(params)
+        elif len(parts) == 2 and parts[0] == "agregaciones":
+            chunks = self.agregacion(parts[1], params)
+        elif parts == ["registros"]:
+            ndjson = params.get("formato", ["json"])[-1] == "ndjson"
+            return ("application/x-ndjson" if ndjson else "application/json"), self.registros(params)
+        elif not parts:
+            chunks = iter([_dumps({"rutas": ["/salud", "/facetas", "/conteo", "/agregaciones/<top|categoria|resumen|sentimientos>",
+                                             "/registros"]})])
+        else:
+            raise ApiError(f"Ruta desconocida: {path}", status=404)
+        return "application/json", chunks
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # necesario para Transfer-Encoding: chunked
+    backend = None  # callable que devuelve el backend de cada petición, asignado por make_server
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        try:
+            content_type, chunks = QueryApi(self.backend()).route(url.path, params)
+            first = next(chunks, "")  # los errores de validación salen antes de enviar cabeceras
+        except ApiError as e:
+            return self._send_error(e.status, str(e))
+        except Exception as e:  # el servidor no debe caerse por una consulta
+            return self._send_error(500, f"{type(e).__name__}: {e}")
+
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            self._write_chunk(first)
+            for chunk in chunks:
+                self._write_chunk(chunk)
+        except Exception as e:
+            # Las cabeceras ya salieron: se corta la conexión sin la parte final, para que
+            # el cliente vea una transferencia incompleta y no un 200 con JSON truncado
+            self.log_error("respuesta interrumpida: %s: %s", type(e).__name__, e)
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+    def _send_error(self, status, message):
+        body = _dumps({"error": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, backend=None):
+    """
+    Servidor HTTP (un hilo por petición) sobre `backend` o, si no se indica, el backend
+    compartido del proceso, que se busca en cada petición: si cambia el Excel, la API
+    pasa a la nueva versión igual que la app.
+    """
+    from backends import get_backend
+
+    if backend is None:
+        def backend_for_request():
+            return get_backend(file=DEFAULT_FILE, valid_sheets=VALID_SHEETS)
+    else:
+        def backend_for_request():
+            return backend
+    handler = type("Handler", (QueryHandler,), {"backend": staticmethod(backend_for_request)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_in_background(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Arranca la API en un hilo daemon (p. ej. junto a Streamlit) y devuelve el servidor."""
+    server = make_server(host, port)
+    threading.Thread(target=server.serve_forever, name="api-consultas", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP/JSON de solo lectura sobre el consolidado.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port)
+    print(f"API de consultas en http://{args.host}:{args.port}/ (backend {server.RequestHandlerClass.backend().name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
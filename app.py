@@ -1,19 +1,31 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from pathlib import Path
-import plotly.express as px
-import folium
-from streamlit_folium import st_folium
-import requests
 import os
-from PIL import Image, ImageOps
+
+import gallery
+from backends import get_backend
+from dataset import DEFAULT_FILE, VALID_SHEETS, export_excel
+from filters import available
+from geo import GeoBoundariesError, cargar_departamentos
+from presets import (
+    URL_PARAMS, PresetsError, delete_preset, ensure_precomputed, find_preset, from_query_params, load_presets,
+    precomputed_view, save_preset, share_link, sync_query_params, to_query_params,
+)
+from profiler import RerunProfiler, panel_enabled
+from aggregations import BAR_COLUMNS, BAR_TOP_N, EXPLORER_DIMS, RANKING_N, RANKINGS
+from render import (
+    SENTIMENT_COL, badges_html, bar_chart, cached_figure, card_fields, estilo_tabla, fuente_html, map_html,
+    sentiment_pie,
+)
 # ================== CONFIG BÁSICA ==================
 st.set_page_config(
     page_title="Información cualitativa departamental",
     page_icon="data/ubicacion.png",
     layout="wide"
 )
+# ⏱️ Cronómetro de etapas de este rerun (ver profiler.py)
+prof = RerunProfiler()
 # =========================================================
 # 🌿 ESTILOS ELEGANTES UNIFICADOS + KPI CARDS
 # =========================================================
@@ -267,16 +279,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+prof.lap("encabezado")
+
 # ================== GALERÍA DE IMÁGENES ==================
 # ================== GALERÍA DE IMÁGENES ==================
-carpeta_imagenes = "./data/imagenes"
+carpeta_imagenes = gallery.CARPETA_IMAGENES
 
 if os.path.exists(carpeta_imagenes):
-    imagenes = [
-        os.path.join(carpeta_imagenes, img)
-        for img in os.listdir(carpeta_imagenes)
-        if img.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))
-    ]
+    imagenes = gallery.list_images(carpeta_imagenes)
 
     if imagenes:
         st.markdown("<h4 style='text-align:center; color:#1e5631;'>Galería de Imágenes</h4>", unsafe_allow_html=True)
@@ -285,10 +295,8 @@ if os.path.exists(carpeta_imagenes):
         for i, img_path in enumerate(imagenes):
             with cols[i % len(cols)]:
                 try:
-                    abs_path = os.path.abspath(img_path)
-                    img = Image.open(abs_path)
-                    img = ImageOps.fit(img, (300, 180), Image.LANCZOS, centering=(0.5, 0.5))
-                    st.image(img, use_container_width=False)
+                    # Miniatura recortada una sola vez por proceso (y guardada en .cache/thumbs)
+                    st.image(gallery.thumbnail(img_path), use_container_width=False)
                 except Exception as e:
                     st.warning(f"No se pudo cargar: {img_path}\nError: {e}")
 
@@ -306,90 +314,12 @@ if os.path.exists(carpeta_imagenes):
         st.info("No se encontraron imágenes en la carpeta.")
 else:
     st.warning(f"La carpeta '{carpeta_imagenes}' no existe.")
+prof.lap("galería")
 
 # ================== CARGA DE DATOS (con hipervínculos) ==================
-from openpyxl import load_workbook
-from pathlib import Path
-import pandas as pd
-import streamlit as st
-
-DEFAULT_FILE = Path("data") / "consolidado_turismo LOTE 1 final.xlsx"
-
-# ✅ Lista de hojas válidas
-VALID_SHEETS = ["Cod Tol", "Cod Putumayo", "Cod Huila", "Cod Caquetá"]
-
-@st.cache_data(show_spinner=False)
-def read_excel_all(file: Path, valid_sheets):
-    """
-    Lee todas las hojas de un Excel e incluye tanto el texto visible como los hipervínculos.
-    Si una celda contiene un enlace, se crea una columna adicional con el sufijo '_URL'.
-    """
-    wb = load_workbook(file, data_only=True)
-    df_list = []
-
-    for sheet in valid_sheets:
-        if sheet not in wb.sheetnames:
-            st.warning(f"⚠️ La hoja '{sheet}' no existe en el archivo.")
-            continue
-
-        ws = wb[sheet]
-
-        # Obtener encabezados
-        headers = [cell.value for cell in ws[1]]
-        if not headers:
-            st.warning(f"⚠️ La hoja '{sheet}' no tiene encabezados válidos.")
-            continue
-
-        data = []
-        for row in ws.iter_rows(min_row=2, max_col=len(headers)):
-            values = []
-            for cell in row:
-                text = cell.value
-                url = cell.hyperlink.target if cell.hyperlink else None
-                values.append((text, url))
-            data.append(values)
-
-        # Crear diccionario: texto + posibles URLs
-        df_dict = {}
-        for j, header in enumerate(headers):
-            # Texto visible
-            df_dict[header] = [data[i][j][0] for i in range(len(data))]
-            # Enlace si existe
-            urls = [data[i][j][1] for i in range(len(data))]
-            if any(urls):
-                df_dict[f"{header}_URL"] = urls
-
-        df_temp = pd.DataFrame(df_dict)
-        df_list.append(df_temp)
-
-    if not df_list:
-        st.error("No se pudieron leer las hojas especificadas.")
-        st.stop()
-
-    df = pd.concat(df_list, ignore_index=True)
-    return df
-
-
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df.columns = df.columns.str.strip()
-    aliases = {
-        "DEPARTAMENTO": "Departamento",
-        "Departamento ": "Departamento",
-        "MUNICIPIO": "Municipio",
-        "ENFOQUE TURÍSTICO": "Enfoque Turístico",
-        "ENFOQUE TURISTICO": "Enfoque Turístico",
-        "DESCRIPCIÓN": "Descripción",
-        "Descripcion": "Descripción",
-        "TITULO": "Título",
-        "ACTOR": "Actor",
-        "SECTOR": "Sector",
-        "ASPECTO": "Aspecto",
-        "NOMBRE": "Nombre",
-    }
-    df.rename(columns={k: v for k, v in aliases.items() if k in df.columns}, inplace=True)
-    df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-    return df
-
+# La lectura del Excel y normalize_columns viven en dataset.py; el resultado se
+# comparte entre sesiones y se precalienta con `python warmup.py`. Los filtros y
+# agregaciones pasan por un backend (pandas o DuckDB, ver backends.py).
 
 # ================== VALIDACIÓN Y EJECUCIÓN ==================
 if not DEFAULT_FILE.exists():
@@ -397,64 +327,177 @@ if not DEFAULT_FILE.exists():
     st.stop()
 
 # 👇 Cargar y normalizar los datos
-df = read_excel_all(DEFAULT_FILE, VALID_SHEETS)
-df = normalize_columns(df)
+try:
+    backend = get_backend(file=DEFAULT_FILE, valid_sheets=VALID_SHEETS)
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+for aviso in backend.avisos:
+    st.warning(aviso)
 
 st.caption(f"Fuente: **{DEFAULT_FILE.name}** · Hojas: {', '.join(VALID_SHEETS)}")
+prof.lap("carga de datos")
+
+# Presets guardados (presets.json): precalculados una vez por versión del dataset (ver presets.py)
+def cargar_presets():
+    """Presets guardados; si presets.json está mal formado se avisa y se sigue sin ellos."""
+    try:
+        return load_presets()
+    except PresetsError as e:
+        st.warning(f"⚠️ {e} Los presets guardados se ignoran hasta corregir el archivo.")
+        return {}
+
+
+presets_guardados = cargar_presets()
+ensure_precomputed(backend, presets_guardados)
+prof.lap("presets")
 
 
 # ================== FUNCIONES AUXILIARES ==================
-def available(col, df): return col in df.columns
-def options_sorted(series): return sorted([x for x in series.dropna().astype(str).str.strip().unique() if x != ""])
-def multiselect_if(col, df, label=None, key=None):
-    if available(col, df):
-        opts = options_sorted(df[col])
-        return st.sidebar.multiselect(label or col, opts, key=key)
+def multiselect_if(col, backend, label=None, key=None):
+    if available(col, backend):
+        opts = backend.options(col)
+        return st.multiselect(label or col, opts, key=key)
     return []
-def filter_by_selection(df, col, selected):
-    if available(col, df) and selected:
-        return df[df[col].isin(selected)]
-    return df
+
+# Columnas del sidebar con la clave de su widget (la misma que su parámetro en la URL)
+FILTROS_SIDEBAR = URL_PARAMS
+SIN_FILTROS = ({col: [] for col in FILTROS_SIDEBAR}, "")
+
+
+def aplicar_filtros(selecciones, query):
+    """Pone los widgets del sidebar en estos filtros y los marca como aplicados."""
+    opciones = {col: set(backend.options(col)) for col in FILTROS_SIDEBAR}
+    selecciones = {col: [v for v in selecciones.get(col) or [] if v in opciones[col]]
+                   for col in FILTROS_SIDEBAR}
+    for col, key in FILTROS_SIDEBAR.items():
+        st.session_state[key] = selecciones[col]
+    st.session_state["busqueda"] = query
+    st.session_state["filtros_aplicados"] = (selecciones, query)
+
+
+def abrir_preset():
+    nombre = st.session_state.get("preset_sel")
+    if nombre in presets_guardados:
+        aplicar_filtros(presets_guardados[nombre]["selections"], presets_guardados[nombre]["query"])
+    st.session_state["preset_sel"] = None
+
+
+def filter_widgets():
+    """Los cinco multiselect y la búsqueda por texto. Devuelve (selecciones, query)."""
+    selecciones = {col: multiselect_if(col, backend, col, key) for col, key in FILTROS_SIDEBAR.items()}
+    with st.expander("🔎 Búsqueda por texto", expanded=False):
+        query = st.text_input("Contiene (min. 2 caracteres)", key="busqueda",
+                              help="Admite expresiones regulares, p. ej. hotel|hostal.")
+    return selecciones, query
+
+
+@st.fragment
+def filtros_en_lote():
+    """
+    Los cambios en los filtros solo vuelven a ejecutar este fragmento: se muestra cuántas
+    filas quedarían (índice de filtros, sin filtrar el DataFrame) y el resto de la página
+    se recalcula una sola vez, al pulsar "Aplicar filtros".
+    """
+    selecciones, query = filter_widgets()
+    pendientes = (selecciones, query) != st.session_state.get("filtros_aplicados", SIN_FILTROS)
+    n_previa = backend.preview_count(selecciones, query)
+    st.caption(f"Vista previa: **{n_previa:,}** filas" + (" · cambios sin aplicar" if pendientes else ""))
+    if st.button("✅ Aplicar filtros", type="primary", use_container_width=True, disabled=not pendientes,
+                 key="aplicar"):
+        st.session_state["filtros_aplicados"] = (selecciones, query)
+        st.rerun()
 
 # ================== FILTROS ==================
+# Al abrir la sesión, los filtros de la URL (?preset=... o ?depto=...&q=...)
+if "url_leida" not in st.session_state:
+    st.session_state["url_leida"] = True
+    nombre_url, selecciones_url, query_url = from_query_params(st.query_params)
+    if nombre_url in presets_guardados:
+        aplicar_filtros(presets_guardados[nombre_url]["selections"], presets_guardados[nombre_url]["query"])
+    elif any(selecciones_url.values()) or query_url:
+        aplicar_filtros(selecciones_url, query_url)
+
 st.sidebar.image("data/betagroup_logo.jpg", width=290)
 st.sidebar.markdown("---")
 st.sidebar.header("Filtros")
 col_btn, _ = st.sidebar.columns([1,1])
 with col_btn:
-    do_reset = st.button("🔄 Limpiar filtros")
-df_f = df.copy()
-if not do_reset:
-    sel_depto   = multiselect_if("Departamento", df, "Departamento", "depto")
-    sel_mpio    = multiselect_if("Municipio", df, "Municipio", "mpio")
-    sel_enfoque = multiselect_if("Enfoque Turístico", df, "Enfoque Turístico", "enfoque")
-    sel_aspecto = multiselect_if("Aspecto", df, "Aspecto", "aspecto")
-    sel_sector  = multiselect_if("Sector", df, "Sector", "sector")
+    do_reset = st.button("🔄 Limpiar filtros", key="limpiar")
+en_lote = st.sidebar.toggle("Aplicar filtros en lote", value=True, key="en_lote",
+                            help="Acumula los cambios y los aplica con un clic, con una vista previa del número de filas.")
+if do_reset:
+    for key in [*FILTROS_SIDEBAR.values(), "busqueda"]:
+        st.session_state.pop(key, None)
+    st.session_state["filtros_aplicados"] = SIN_FILTROS
+with st.sidebar:
+    if en_lote:
+        filtros_en_lote()
+        selecciones, query = st.session_state.get("filtros_aplicados", SIN_FILTROS)
+    else:
+        selecciones, query = filter_widgets()
+        st.session_state["filtros_aplicados"] = (selecciones, query)
+
+# --- Presets: abrir, guardar y compartir (la URL siempre refleja los filtros aplicados) ---
+preset_actual = find_preset(presets_guardados, selecciones, query)
+params_url = to_query_params(selecciones, query, preset_actual)
+sync_query_params(st.query_params, params_url)
+with st.sidebar.expander("⭐ Presets de filtros", expanded=False):
+    st.selectbox("Abrir preset", sorted(presets_guardados), index=None, key="preset_sel",
+                 placeholder="Elige un preset guardado", on_change=abrir_preset)
+    nombre_preset = st.text_input("Nombre del preset (filtros aplicados)", key="preset_nombre",
+                                  placeholder=preset_actual or "p. ej. Huila cultural").strip() or preset_actual
+    col_guardar, col_borrar = st.columns(2)
+    with col_guardar:
+        if st.button("💾 Guardar", disabled=not nombre_preset or nombre_preset == preset_actual,
+                     use_container_width=True):
+            try:
+                save_preset(nombre_preset, selecciones, query)
+            except PresetsError as e:
+                st.error(f"⚠️ {e} No se guardó el preset.")
+            else:
+                presets_guardados = cargar_presets()
+                ensure_precomputed(backend, presets_guardados)
+                preset_actual = nombre_preset
+                sync_query_params(st.query_params, to_query_params(selecciones, query, preset_actual))
+                st.success(f"Preset «{nombre_preset}» guardado.")
+    with col_borrar:
+        if st.button("🗑️ Eliminar", disabled=nombre_preset not in presets_guardados, use_container_width=True):
+            try:
+                delete_preset(nombre_preset)
+            except PresetsError as e:
+                st.error(f"⚠️ {e} No se eliminó el preset.")
+            else:
+                presets_guardados = cargar_presets()
+                preset_actual = None
+                sync_query_params(st.query_params, to_query_params(selecciones, query))
+                st.info(f"Preset «{nombre_preset}» eliminado.")
+    st.caption("Enlace para compartir (se agrega a la dirección de la app):")
+    st.code(share_link(to_query_params(selecciones, query, preset_actual)), language=None)
+prof.lap("widgets de filtros")
+
+# Filtros de un preset precalculado: filas ya seleccionadas; si no, la cadena completa
+vista = precomputed_view(backend, selecciones, query)
+if vista is not None:
+    prof.lap("preset precalculado")
 else:
-    sel_depto = sel_mpio = sel_enfoque = sel_aspecto = sel_sector = []
-df_f = filter_by_selection(df_f, "Departamento", sel_depto)
-df_f = filter_by_selection(df_f, "Municipio", sel_mpio)
-df_f = filter_by_selection(df_f, "Enfoque Turístico", sel_enfoque)
-df_f = filter_by_selection(df_f, "Aspecto", sel_aspecto)
-df_f = filter_by_selection(df_f, "Sector", sel_sector)
-with st.sidebar.expander("🔎 Búsqueda por texto", expanded=False):
-    search_cols = [c for c in ["Nombre", "Actor", "Título", "Descripción"] if available(c, df_f)]
-    query = st.text_input("Contiene (min. 2 caracteres)")
-    if query and len(query) >= 2 and search_cols:
-        mask = pd.Series(False, index=df_f.index)
-        for c in search_cols:
-            mask = mask | df_f[c].fillna("").astype(str).str.contains(query, case=False, na=False)
-        df_f = df_f[mask]
+    vista = backend.view()
+    for col, sel in selecciones.items():
+        vista = vista.filter(col, sel)
+        prof.lap(f"filtro {col}")
+    vista = vista.search(query)
+n_filas = vista.count()
+prof.lap("búsqueda por texto")
 st.sidebar.markdown("---")
 st.sidebar.image("data/OIP.webp", width=290)
 
 # ================== KPIs ==================
 c1, c2 = st.columns(2)
 with c1:
-    st.markdown(f'<div class="kpi-card"><p class="kpi-title">Filas filtradas</p><p class="kpi-value">{len(df_f):,}</p></div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="kpi-card"><p class="kpi-title">Filas filtradas</p><p class="kpi-value">{n_filas:,}</p></div>', unsafe_allow_html=True)
 with c2:
-    if available("Departamento", df_f):
-        st.markdown(f'<div class="kpi-card"><p class="kpi-title">Departamentos</p><p class="kpi-value">{df_f["Departamento"].nunique():,}</p></div>', unsafe_allow_html=True)
+    if available("Departamento", vista):
+        st.markdown(f'<div class="kpi-card"><p class="kpi-title">Departamentos</p><p class="kpi-value">{vista.nunique("Departamento"):,}</p></div>', unsafe_allow_html=True)
 st.divider()
 
 # ================== TABS ==================
@@ -469,6 +512,8 @@ tab_resumen, tab_tabla, tab_explorar, tab_barras, tab_sentimientos = st.tabs([
 # ... aquí puedes dejar el resto de tu código para resumen, tarjetas, mapa y barras tal como ya lo tienes ...
 
 
+prof.lap("kpis y pestañas")
+
 # ================== CSS PARA AGRANDAR TABS ==================
 st.markdown("""
     <style>
@@ -480,130 +525,81 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# Función de estilo reutilizable (sin highlight_max)
-def estilo_tabla(df):
-    return (
-        df.style
-        .set_properties(**{
-            "background-color": "#f9fafb",   # gris muy claro
-            "color": "#111827",              # texto oscuro
-            "border-color": "#e5e7eb",       # bordes suaves
-            "border-radius": "8px",          # esquinas redondeadas
-            "padding": "6px",                # espacio interno
-        })
-        .set_table_styles([
-            {"selector": "thead th", "props": [("background-color", "#3b82f6"), 
-                                               ("color", "white"),
-                                               ("font-size", "14px"),
-                                               ("padding", "8px"),
-                                               ("text-align", "center")]},
-            {"selector": "tbody td", "props": [("font-size", "13px"),
-                                               ("text-align", "center")]}
-        ])
-    )
+# estilo_tabla, los gráficos y los campos de las tarjetas viven en render.py
+# (compartidos con los reportes estáticos de reports.py).
 
 with tab_resumen:
     # Pequeños rankings
-    cols = st.columns(2)
-    if available("Aspecto", df_f) and not df_f["Aspecto"].dropna().empty:
-        top_aspecto = df_f["Aspecto"].value_counts().head(5).reset_index()
-        top_aspecto.columns = ["Aspecto", "Conteo"]
-        with cols[0]:
-            st.subheader("Top 5 Aspectos")
-            st.dataframe(estilo_tabla(top_aspecto), use_container_width=True, hide_index=True)
-
-    if available("Enfoque Turístico", df_f) and not df_f["Enfoque Turístico"].dropna().empty:
-        top_enfoque = df_f["Enfoque Turístico"].value_counts().head(5).reset_index()
-        top_enfoque.columns = ["Enfoque Turístico", "Conteo"]
-        with cols[1]:
-            st.subheader("Top 5 Enfoques")
-            st.dataframe(estilo_tabla(top_enfoque), use_container_width=True, hide_index=True)
+    cols = st.columns(len(RANKINGS))
+    for col_ranking, (col, titulo) in zip(cols, RANKINGS):
+        top = vista.top(col, RANKING_N) if available(col, vista) else None
+        if top is not None and not top.empty:
+            with col_ranking:
+                st.subheader(titulo)
+                st.dataframe(estilo_tabla(top), use_container_width=True, hide_index=True)
 
-# --------- TABLA (AgGrid) ----------
-import pandas as pd
-import io
+prof.lap("resumen")
 
+# --------- TABLA (AgGrid) ----------
 with tab_tabla:
     st.subheader("🗂️ Explora los registros en formato tarjetas")
 
     # --- 📥 Botón para descargar datos filtrados ---
-    if len(df_f) > 0:
-        # Convertir el DataFrame filtrado a Excel en memoria
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df_f.to_excel(writer, index=False, sheet_name='Datos Filtrados')
-        buffer.seek(0)
+    if n_filas > 0:
+        # El Excel se genera solo al hacer clic (la vista filtrada se materializa entonces);
+        # ese tiempo se registra aparte, como un evento "descarga" del perfilador
+        vista_export = vista
+
+        def exportar():
+            perf = RerunProfiler()
+            datos = export_excel(vista_export.to_frame())
+            perf.lap("exportar excel")
+            perf.finish(rerun=False, evento="descarga", filas=n_filas, backend=backend.name)
+            return datos
 
         # Botón de descarga con estilo
         st.download_button(
             label="📥 Descargar datos filtrados (Excel)",
-            data=buffer,
+            data=exportar,
             file_name="datos_filtrados.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             help="Descarga la información mostrada en las tarjetas.",
             use_container_width=True
         )
+    prof.lap("botón de descarga")
 
     # --- Si no hay resultados ---
-    if len(df_f) == 0:
+    if n_filas == 0:
         st.info("No hay filas con los filtros actuales. Ajusta filtros o limpia la búsqueda.")
     else:
         # --- Mostrar tarjetas ---
-        for i, row in df_f.head(50).iterrows():  # límite para no sobrecargar
+        for i, row in vista.head(50).iterrows():  # límite para no sobrecargar
             with st.container():
                 st.markdown('<div class="card">', unsafe_allow_html=True)
 
+                tarjeta = card_fields(row, i)
+
                 # ---- TÍTULO ----
-                title = row.get("Título") or row.get("Titulo") or row.get("Nombre") or f"Registro {i}"
-                st.markdown(f"<h4>{title}</h4>", unsafe_allow_html=True)
+                st.markdown(f"<h4>{tarjeta['title']}</h4>", unsafe_allow_html=True)
 
                 # ---- BADGES ----
-                badges = []
-                for b in ["Departamento", "Municipio", "Enfoque Turístico", "Aspecto", "Sector", "Actor"]:
-                    v = row.get(b)
-                    if v and str(v).strip():
-                        badges.append(f'<span class="badge">{b}: {v}</span>')
-                if badges:
-                    st.markdown(" ".join(badges), unsafe_allow_html=True)
+                if tarjeta["badges"]:
+                    st.markdown(badges_html(tarjeta["badges"]), unsafe_allow_html=True)
 
                 # ---- DESCRIPCIÓN ----
-                desc = (row.get("Descripción") or "").strip()
-                if desc:
+                if tarjeta["desc"]:
                     st.markdown("<h5>Descripción</h5>", unsafe_allow_html=True)
-                    st.markdown(f"<p>{desc}</p>", unsafe_allow_html=True)
+                    st.markdown(f"<p>{tarjeta['desc']}</p>", unsafe_allow_html=True)
 
                 # ---- APORTE ----
-                apInvest = (row.get("Aporte a la Investigación") or "").strip()
-                if apInvest:
+                if tarjeta["aporte"]:
                     st.markdown("<h5>Aporte a la investigación</h5>", unsafe_allow_html=True)
-                    st.markdown(f"<p>{apInvest}</p>", unsafe_allow_html=True)
+                    st.markdown(f"<p>{tarjeta['aporte']}</p>", unsafe_allow_html=True)
 
                 # ---- FUENTE ----
-                fuente_nombre_cols = ["Fuente", "Fuente / Autor", "Autor", "Autores", "Entidad", "Institución"]
-                fuente_url_cols = ["Fuente_URL", "Fuente / Autor_URL", "Autor_URL", "Autores_URL", "Entidad_URL", "Institución_URL"]
-
-                fuente_nombre, fuente_url = "", ""
-                for c in fuente_nombre_cols:
-                    if c in row and str(row.get(c)).strip() not in ["", "nan", "None"]:
-                        fuente_nombre = str(row.get(c)).strip()
-                        break
-
-                for c in fuente_url_cols:
-                    if c in row and str(row.get(c)).strip() not in ["", "nan", "None"]:
-                        fuente_url = str(row.get(c)).strip()
-                        break
-
-                if fuente_url and not fuente_url.lower().startswith(("http://", "https://")):
-                    fuente_url = "https://" + fuente_url
-
-                if fuente_nombre or fuente_url:
+                if tarjeta["fuente_nombre"] or tarjeta["fuente_url"]:
                     st.markdown("<h5>Fuente</h5>", unsafe_allow_html=True)
-                    if fuente_url and fuente_nombre:
-                        st.markdown(f'<p><a href="{fuente_url}" target="_blank" rel="noopener noreferrer">{fuente_nombre}</a></p>', unsafe_allow_html=True)
-                    elif fuente_url:
-                        st.markdown(f'<p><a href="{fuente_url}" target="_blank" rel="noopener noreferrer">{fuente_url}</a></p>', unsafe_allow_html=True)
-                    elif fuente_nombre:
-                        st.markdown(f"<p>{fuente_nombre}</p>", unsafe_allow_html=True)
+                    st.markdown(fuente_html(tarjeta["fuente_nombre"], tarjeta["fuente_url"]), unsafe_allow_html=True)
 
                 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -611,93 +607,27 @@ with tab_tabla:
                 st.markdown("""
                 <hr style="border: none; border-top: 3px solid #3fb4a1; margin: 18px 0; opacity: 0.6;">
                 """, unsafe_allow_html=True)
-
+    prof.lap("tarjetas")
 
 # --------- EXPLORADOR (Treemap / Sunburst) ----------
 # -------------------------------
-# -------------------------------
-# Cargar GeoJSON de departamentos desde GeoBoundaries
-# -------------------------------
-@st.cache_data
-def cargar_departamentos():
-    url_meta = "https://www.geoboundaries.org/api/current/gbOpen/COL/ADM1"
-    r = requests.get(url_meta)
-    if r.status_code == 200:
-        meta = r.json()
-        url_geojson = meta["gjDownloadURL"]
-        r2 = requests.get(url_geojson)
-        if r2.status_code == 200:
-            return r2.json()
-        else:
-            st.error("⚠️ No se pudo descargar el archivo GeoJSON desde GeoBoundaries.")
-            return None
-    else:
-        st.error("⚠️ No se pudo obtener metadatos de GeoBoundaries.")
-        return None
-
-
 # -------------------------------
 # Explorador con filtros
 # -------------------------------
 with tab_explorar:
-    geojson_departamentos = cargar_departamentos()
-
-    # -------------------------------
-    # Coordenadas aproximadas de municipios
-    # -------------------------------
-    coords_municipios = {
-        # 🔹 Huila
-        "Villavieja": [3.2189, -75.2189],
-        "Neiva": [2.9386, -75.2819],
-        "Garzón": [2.1953, -75.6275],
-        "Paicol": [2.4500, -75.7667],
-        "Yaguará": [2.6642, -75.5178],
-        "San Agustín": [1.8828, -76.2683],
-        "Pitalito": [1.8536, -76.0498],
-
-        # 🔹 Tolima
-        "Líbano": [4.9211, -75.0622],
-        "San Sebastián de Mariquita": [5.1989, -74.8944],
-        "Falan": [5.1175, -74.9517],
-        "Ibagué": [4.4389, -75.2322],
-        "Honda": [5.0713, -74.6949],
-        "Armero": [5.0300, -74.9000],
-        "Prado": [3.7500, -74.9167],
-
-        # 🔹 Putumayo
-        "Puerto Asís": [0.5052, -76.4951],
-        "Orito": [0.6781, -76.8723],
-        "Puerto Caicedo": [0.6953, -76.6044],
-        "Valle del Guamuez": [0.4519, -76.9292],
-        "Villagarzón": [0.9892, -76.6279],
-        "Mocoa": [1.1474, -76.6473],
-        "Sibundoy": [1.2081, -76.9220],
-        "Colón": [1.1900, -76.9740],
-        "Santiago": [1.1461, -77.0031],
-        "San Francisco": [1.1761, -76.8789],
-
-        # 🔹 Caquetá
-        "San Vicente del Caguán": [2.1167, -74.7667],
-        "Doncello": [1.6789, -75.2806],
-        "Florencia": [1.6144, -75.6062],
-        "San José del Fragua": [1.3300, -75.9700],
-        "Belén de los Andaquies": [1.4167, -75.8667],
-    }
-
-    # --- Relación de municipios por departamento ---
-    municipios_por_departamento = {
-        "Huila": ["Villavieja", "Neiva", "Garzón", "Paicol", "Yaguará", "San Agustín", "Pitalito"],
-        "Tolima": ["Líbano", "San Sebastián de Mariquita", "Falan", "Ibagué", "Honda", "Armero", "Prado"],
-        "Putumayo": ["Puerto Asís", "Orito", "Puerto Caicedo", "Valle del Guamuez", "Villagarzón", "Mocoa", "Sibundoy", "Colón", "Santiago", "San Francisco"],
-        "Caquetá": ["San Vicente del Caguán", "Doncello", "Florencia", "San José del Fragua", "Belén de los Andaquies"],
-    }
+    try:
+        geojson_departamentos = cargar_departamentos()
+    except GeoBoundariesError as e:
+        st.error(str(e))
+        geojson_departamentos = None
+    prof.lap("límites geográficos")
 
     with st.container():
         st.subheader("🗺️ Explorador geográfico con filtros")
         st.caption("Filtra por Departamento, Municipio, Aspecto, Enfoque o Sector y visualiza los resultados en el mapa.")
 
         # --- Columnas disponibles dinámicamente ---
-        dims = [d for d in ["Departamento", "Municipio", "Aspecto", "Enfoque Turístico", "Sector"] if d in df_f.columns]
+        dims = [d for d in EXPLORER_DIMS if available(d, vista)]
 
         if len(dims) == 0:
             st.info("⚠️ No se encuentran columnas categóricas para filtrar.")
@@ -705,15 +635,13 @@ with tab_explorar:
             # Crear filtros dinámicos
             filtros = {}
             for dim in dims:
-                valores = sorted(df_f[dim].dropna().unique())
+                valores = vista.distinct(dim)
                 seleccion = st.multiselect(f"📍 Filtrar por {dim}:", valores, default=valores)
                 filtros[dim] = seleccion
 
             # Aplicar filtros
-            df_filtrado = df_f.copy()
-            for dim, seleccion in filtros.items():
-                if seleccion:
-                    df_filtrado = df_filtrado[df_filtrado[dim].isin(seleccion)]
+            vista_explorar = vista.explore(filtros)
+            n_explorar = vista_explorar.count()
 
             # Layout en dos columnas
             col1, col2 = st.columns([2, 2])
@@ -721,169 +649,76 @@ with tab_explorar:
             # --- Resumen en tabla ---
             with col1:
                 st.markdown("### 📊 Resumen filtrado")
-                if len(df_filtrado) == 0:
+                if n_explorar == 0:
                     st.info("No hay registros con los filtros seleccionados.")
                 else:
-                    resumen = df_filtrado.groupby(dims).size().reset_index(name="Conteo")
+                    resumen = vista_explorar.summary(dims)
                     st.dataframe(resumen, use_container_width=True)
 
             # --- Mapa geográfico ---
             with col2:
                 st.markdown("### 🗺️ Mapa interactivo")
-                if len(df_filtrado) == 0:
+                if n_explorar == 0:
                     st.caption("No hay datos para mostrar en el mapa.")
                 else:
-                    departamentos = df_filtrado["Departamento"].unique()
-
-                    # Crear mapa
-                    m = folium.Map(location=[2.5, -75.0], zoom_start=6, tiles="cartodbpositron")
-
-                    # --- Colores para departamentos filtrados ---
-                    colores = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#9B59B6", "#E67E22", "#1ABC9C"]
-                    color_map = {depto: colores[i % len(colores)] for i, depto in enumerate(departamentos)}
-
-                    # Dibujar departamentos y municipios
-                    if geojson_departamentos:
-                        for feature in geojson_departamentos["features"]:
-                            nombre_depto = feature["properties"]["shapeName"]
-                            if nombre_depto in departamentos:
-                                folium.GeoJson(
-                                    feature,
-                                    name=nombre_depto,
-                                    style_function=lambda f, nombre=nombre_depto: {
-                                        "fillColor": color_map[nombre],
-                                        "color": "black",
-                                        "weight": 2,
-                                        "fillOpacity": 0.5,
-                                    },
-                                    tooltip=folium.GeoJsonTooltip(fields=["shapeName"], aliases=["Departamento:"]),
-                                ).add_to(m)
-
-                                # --- Marcar municipios de ese departamento con el mismo color ---
-                                municipios = municipios_por_departamento.get(nombre_depto, [])
-                                for municipio in municipios:
-                                    coords_mun = coords_municipios.get(municipio)
-                                    if coords_mun:
-                                        folium.Marker(
-                                            location=coords_mun,
-                                            popup=f"<b>{municipio}</b><br>Departamento: {nombre_depto}",
-                                            tooltip=f"{municipio} ({nombre_depto})",
-                                            icon=folium.Icon(color="blue", icon_color=color_map[nombre_depto], icon="", prefix="fa"),
-                                        ).add_to(m)
-
-                    # Mostrar mapa
-                    st_folium(m, width=900, height=600)
+                    departamentos = vista_explorar.unique_in_order("Departamento")
+
+                    # Mapa (departamentos coloreados + marcadores de municipios), renderizado
+                    # una vez por combinación de departamentos y mostrado como HTML
+                    st.iframe(map_html(geojson_departamentos, departamentos), height=600)
+prof.lap("mapa")
 
 # --------- BARRAS DINÁMICAS ----------
 with tab_barras:
     st.subheader("📊 Comparación por categorías")
 
-    cols = [c for c in ["Aspecto", "Enfoque Turístico", "Municipio", "Departamento", "Sector"] if available(c, df_f)]
+    cols = [c for c in BAR_COLUMNS if available(c, vista)]
     
     if not cols:
         st.info("No hay columnas categóricas disponibles para graficar.")
     else:
-        col_sel = st.selectbox("📍 Selecciona categoría", cols, index=0)
-        top_n = st.slider("🔝 Top N", 5, 50, 20, step=5)
+        col_sel = st.selectbox("📍 Selecciona categoría", cols, index=0, key="barras_col")
+        top_n = st.slider("🔝 Top N", 5, 50, BAR_TOP_N, step=5, key="barras_top")
+
+        vc = vista.category(col_sel, top_n)
 
-        s = df_f[col_sel].dropna().astype(str).str.strip()
-        s = s[s != ""]
-        
-        if s.empty:
+        if vc.empty:
             st.info("⚠️ No hay datos válidos para la categoría seleccionada.")
         else:
-            vc = s.value_counts().head(top_n).reset_index()
-            vc.columns = [col_sel, "Conteo"]
-
-            fig = px.bar(
-                vc,
-                x="Conteo",
-                y=col_sel,
-                orientation="h",
-                text="Conteo",
-                color="Conteo",
-                color_continuous_scale="plasma"  # gradiente bonito
-            )
-
-            fig.update_traces(
-                texttemplate="%{text}",
-                textposition="outside",
-                marker=dict(line=dict(width=0.5, color="white"))
-            )
-
-            fig.update_layout(
-                yaxis={"categoryorder": "total ascending"},
-                height=600,
-                margin=dict(l=10, r=10, t=30, b=10),
-                xaxis_title="Número de registros",
-                yaxis_title="",
-                plot_bgcolor="rgba(0,0,0,0)",  # fondo transparente
-                paper_bgcolor="rgba(0,0,0,0)",
-                font=dict(size=13)
-            )
+            # Cacheada por (columna, Top N, filtros): cambiar otro widget no la reconstruye
+            fig = cached_figure("barras", col_sel, top_n, vista.signature, lambda: bar_chart(vc, col_sel))
 
             st.plotly_chart(fig, use_container_width=True)
-            # --------- NUEVA PESTAÑA: ANÁLISIS DE SENTIMIENTOS ----------
+prof.lap("barras")
+
+# --------- NUEVA PESTAÑA: ANÁLISIS DE SENTIMIENTOS ----------
 with tab_sentimientos:
     st.subheader("💬 Análisis de Sentimientos Identificados")
 
-    if not available("Sentimiento identificado", df_f):
+    if not available("Sentimiento identificado", vista):
         st.warning("⚠️ No se encontró la columna 'Sentimiento identificado' en los datos.")
     else:
-        # Normalizar texto de la columna
-        df_f["Sentimiento identificado"] = (
-            df_f["Sentimiento identificado"]
-            .astype(str)
-            .str.strip()
-            .str.capitalize()
-        )
-
-        # Contar los sentimientos
-        sentiment_counts = (
-            df_f["Sentimiento identificado"]
-            .value_counts()
-            .reset_index()
-        )
-        sentiment_counts.columns = ["Sentimiento identificado", "Conteo"]
+        # Contar los sentimientos (texto normalizado: sin espacios y con mayúscula inicial)
+        sentiment_counts = vista.sentiments()
 
         # Mostrar tabla resumen
         st.markdown("### 📋 Distribución de sentimientos")
         st.dataframe(estilo_tabla(sentiment_counts), use_container_width=True, hide_index=True)
 
-        # Colores personalizados según sentimiento
-        sentiment_colors = {
-            "Muy positivo": "#2ECC71",   # Verde fuerte
-            "Positivo": "#58D68D",       # Verde claro
-            "Neutro": "#B2BABB",         # Gris
-            "Negativo": "#E67E22",       # Naranja
-            "Muy negativo": "#E74C3C",   # Rojo
-        }
-
         # Crear gráfico circular
-        fig_pie = px.pie(
-            sentiment_counts,
-            names="Sentimiento identificado",
-            values="Conteo",
-            color="Sentimiento identificado",
-            color_discrete_map=sentiment_colors,
-            hole=0.3,
-            title="Distribución porcentual de sentimientos"
-        )
-        fig_pie.update_traces(
-            textposition="inside",
-            textinfo="percent+label",
-            pull=[0.05] * len(sentiment_counts)
-        )
+        fig_pie = cached_figure("sentimientos", SENTIMENT_COL, None, vista.signature,
+                                lambda: sentiment_pie(sentiment_counts))
         st.plotly_chart(fig_pie, use_container_width=True)
 
         # Mostrar registros por sentimiento
         st.markdown("### 🔍 Registros agrupados por sentimiento")
         sentimiento_sel = st.selectbox(
             "Selecciona un sentimiento para explorar ejemplos:",
-            sentiment_counts["Sentimiento identificado"]
+            sentiment_counts["Sentimiento identificado"],
+            key="sentimiento_sel"
         )
 
-        df_sel = df_f[df_f["Sentimiento identificado"] == sentimiento_sel]
+        df_sel = vista.sentiment_rows(sentimiento_sel, 20)
         if df_sel.empty:
             st.info("No hay registros con este sentimiento.")
         else:
@@ -892,3 +727,11 @@ with tab_sentimientos:
                     f"**• {row.get('Título', 'Sin título')}** — "
                     f"{row.get('Descripción', '')[:200]}..."
                 )
+prof.lap("sentimientos")
+
+# ================== PERFILADOR (panel oculto: ?profiler=1) ==================
+registro_perf = prof.finish(filas=n_filas, backend=backend.name)
+if panel_enabled(st.query_params):
+    with st.sidebar.expander("⏱️ Perfilador de rerun", expanded=True):
+        st.caption(f"Total: **{registro_perf['total_ms']:,.1f} ms** · {n_filas:,} filas · backend {backend.name}")
+        st.dataframe(pd.DataFrame(registro_perf["etapas"]), use_container_width=True, hide_index=True)
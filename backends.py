@@ -0,0 +1,432 @@
+# backends.py
+"""
+Backends de consulta para los filtros y agregaciones de la app.
+
+La app no trabaja directamente con el DataFrame filtrado sino con una *vista*:
+la selección del sidebar, la búsqueda por texto y los filtros del explorador se
+encadenan sobre ella, y cada pestaña le pide solo lo que va a mostrar (conteos,
+rankings, las primeras filas, ...).
+
+    pandas  (por defecto) todo en memoria sobre el DataFrame del consolidado.
+    duckdb  el consolidado queda en Parquet (.cache/) y cada vista se traduce a
+            SQL; solo se materializan en pandas las filas o agregados mostrados.
+            Requiere `pip install duckdb`.
+
+Se elige con la variable de entorno VISUALIZADOR_BACKEND (pandas | duckdb).
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import aggregations
+from aggregations import SENTIMENT_COL, normalize_sentiment
+from dataset import CACHE_DIR, CACHE_VERSION, DEFAULT_FILE, VALID_SHEETS, dataset_hash, load_dataset
+from filters import (
+    FILTER_COLUMNS, MIN_QUERY_LEN, SEARCH_COLUMNS, FilterIndex, apply_explorer_filters, available,
+    explorer_signature, filter_by_selection, filter_signature, options_sorted, search_mask, search_regex,
+    search_text,
+)
+
+ENV_BACKEND = "VISUALIZADOR_BACKEND"
+BACKENDS = ("pandas", "duckdb")
+# Máscaras de búsqueda de preview_count: una Series booleana del largo del consolidado por
+# consulta, así que van en su propia caché chica y no desplazan a las agregaciones
+MAX_MASCARAS = 16
+
+_mascaras = OrderedDict()
+_mascaras_lock = threading.Lock()
+
+
+class _View:
+    """Estado común de las vistas: qué se filtró, para construir la firma de caché."""
+
+    def __init__(self, backend, selections=None, query="", filtros=None):
+        self.backend = backend
+        self.selections = dict(selections or {})
+        self.query = query
+        self.filtros = filtros
+
+    @property
+    def signature(self):
+        firma = filter_signature(self.backend.digest, self.selections, self.query)
+        return explorer_signature(firma, self.filtros) if self.filtros is not None else firma
+
+
+# ================== PANDAS ==================
+class PandasView(_View):
+    """Resultado filtrado en memoria; las agregaciones se cachean por firma de filtros."""
+
+    def __init__(self, backend, df, selections=None, query="", filtros=None):
+        super().__init__(backend, selections, query, filtros)
+        self.df = df
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    # --- Filtros ---
+    def filter(self, col, selected):
+        selections = {**self.selections, col: list(selected or [])}
+        return PandasView(self.backend, filter_by_selection(self.df, col, selected), selections, self.query)
+
+    def search(self, query):
+        return PandasView(self.backend, search_text(self.df, query), self.selections, query)
+
+    def explore(self, filtros):
+        return PandasView(self.backend, apply_explorer_filters(self.df, filtros),
+                          self.selections, self.query, dict(filtros))
+
+    # --- Lo que muestran las pestañas ---
+    def count(self):
+        return len(self.df)
+
+    def nunique(self, col):
+        return self.df[col].nunique()
+
+    def distinct(self, col):
+        """Valores no nulos ordenados (opciones de los filtros del explorador)."""
+        return sorted(self.df[col].dropna().unique())
+
+    def unique_in_order(self, col):
+        """Valores en orden de aparición (colores del mapa)."""
+        return list(self.df[col].dropna().unique())
+
+    def top(self, col, n=5):
+        return aggregations.aggregate(self.signature, "top", self.df, col, n)
+
+    def category(self, col, top_n):
+        return aggregations.aggregate(self.signature, "categoria", self.df, col, top_n)
+
+    def summary(self, dims):
+        return aggregations.aggregate(self.signature, "resumen", self.df, tuple(dims))
+
+    def sentiments(self):
+        return aggregations.aggregate(self.signature, "sentimientos", self.df)
+
+    def sentiment_rows(self, sentimiento, n):
+        return self.df[normalize_sentiment(self.df[SENTIMENT_COL]) == sentimiento].head(n)
+
+    def head(self, n):
+        return self.df.head(n)
+
+    def rows(self, offset, limit):
+        """Página de registros en el orden del consolidado."""
+        return self.df.iloc[offset:offset + limit]
+
+    def to_frame(self):
+        return self.df
+
+
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, file=DEFAULT_FILE, valid_sheets=VALID_SHEETS):
+        df, avisos = load_dataset(file, valid_sheets)
+        self._open(df, dataset_hash(file, valid_sheets), avisos)
+
+    @classmethod
+    def from_frame(cls, df, digest, avisos=()):
+        """Backend sobre un DataFrame ya normalizado (benchmarks y pruebas)."""
+        backend = cls.__new__(cls)
+        backend._open(df, digest, list(avisos))
+        return backend
+
+    def _open(self, df, digest, avisos):
+        self.df, self.digest, self.avisos = df, digest, avisos
+        self.columns = list(self.df.columns)
+
+    def options(self, col):
+        """Opciones del multiselect de `col`, calculadas una vez por versión del dataset."""
+        if not available(col, self):
+            return []
+        return aggregations.memoize((self.name, self.digest, "opciones", col), lambda: options_sorted(self.df[col]))
+
+    def view(self):
+        return PandasView(self, self.df)
+
+    def view_rows(self, rows, selections, query=""):
+        """Vista sobre filas ya seleccionadas (posiciones) que corresponden a `selections` y `query`."""
+        return PandasView(self, self.df.iloc[rows], selections, query)
+
+    @cached_property
+    def index(self):
+        return FilterIndex(self.df)
+
+    def preview_count(self, selections, query=""):
+        """Filas que dejarían `selections` y `query`, contadas sobre el índice (sin filtrar el DataFrame)."""
+        return self.index.count(selections, self._search_mask(query) if query else None)
+
+    def _search_mask(self, query):
+        key = (self.digest, query)
+        with _mascaras_lock:
+            if key in _mascaras:
+                _mascaras.move_to_end(key)
+                return _mascaras[key]
+
+        mask = search_mask(self.df, query)
+
+        with _mascaras_lock:
+            _mascaras[key] = mask
+            while len(_mascaras) > MAX_MASCARAS:
+                _mascaras.popitem(last=False)
+        return mask
+
+
+# ================== DUCKDB ==================
+def _q(col):
+    """Identificador SQL entre comillas (las columnas tienen espacios y tildes)."""
+    return '"' + str(col).replace('"', '""') + '"'
+
+
+def _text(col):
+    return f"coalesce(CAST({_q(col)} AS VARCHAR), '')"
+
+
+def _sentiment_expr():
+    # Igual que normalize_sentiment: astype(str).str.strip().str.capitalize() (los nulos quedan nulos)
+    s = f"trim(CAST({_q(SENTIMENT_COL)} AS VARCHAR))"
+    return f"(upper(left({s}, 1)) || lower(substr({s}, 2)))"
+
+
+ROW_ID = "_fila"
+
+
+class DuckDBView(_View):
+    """Vista perezosa: acumula condiciones WHERE y las ejecuta solo al pedir un resultado."""
+
+    def __init__(self, backend, where=(), params=(), selections=None, query="", filtros=None):
+        super().__init__(backend, selections, query, filtros)
+        self.where = tuple(where)
+        self.params = tuple(params)
+
+    @property
+    def columns(self):
+        return self.backend.columns
+
+    def _derive(self, cond=None, params=(), **changes):
+        where = self.where + ((cond,) if cond else ())
+        state = {"selections": self.selections, "query": self.query, "filtros": self.filtros, **changes}
+        return DuckDBView(self.backend, where, self.params + tuple(params), **state)
+
+    def _sql(self, select, extra_where=(), tail=""):
+        where = self.where + tuple(extra_where)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        return f"SELECT {select} FROM consolidado{clause} {tail}"
+
+    def _df(self, select, extra_where=(), tail="", params=()):
+        return self.backend.query(self._sql(select, extra_where, tail), self.params + tuple(params))
+
+    def _memo(self, name, args, compute):
+        # El nombre del backend en la clave: los tipos de los resultados difieren de los de pandas
+        return aggregations.memoize((self.backend.name, self.signature, name, args), compute)
+
+    # --- Filtros ---
+    def filter(self, col, selected):
+        selections = {**self.selections, col: list(selected or [])}
+        if not (available(col, self) and selected):
+            return self._derive(selections=selections)
+        marks = ", ".join("?" for _ in selected)
+        return self._derive(f"{_q(col)} IN ({marks})", list(selected), selections=selections)
+
+    def search(self, query):
+        cols = [c for c in SEARCH_COLUMNS if available(c, self)]
+        if not (query and len(query) >= MIN_QUERY_LEN and cols):
+            return self._derive(query=query)
+        if search_regex(query) is not None and self.backend.accepts_regex(query):
+            cond = "(" + " OR ".join(f"regexp_matches({_text(c)}, ?, 'i')" for c in cols) + ")"
+        else:
+            cond = "(" + " OR ".join(f"contains(lower({_text(c)}), lower(?))" for c in cols) + ")"
+        return self._derive(cond, [query] * len(cols), query=query)
+
+    def explore(self, filtros):
+        view = self._derive(filtros=dict(filtros))
+        for dim, seleccion in filtros.items():
+            if seleccion:
+                marks = ", ".join("?" for _ in seleccion)
+                view = view._derive(f"{_q(dim)} IN ({marks})", list(seleccion))
+        return view
+
+    # --- Lo que muestran las pestañas ---
+    def count(self):
+        return self._memo("count", (), lambda: int(self._df("count(*) AS n")["n"].iloc[0]))
+
+    def nunique(self, col):
+        return self._memo("nunique", (col,), lambda: int(self._df(f"count(DISTINCT {_q(col)}) AS n")["n"].iloc[0]))
+
+    def distinct(self, col):
+        return self._memo("distinct", (col,), lambda: self._df(
+            f"DISTINCT {_q(col)} AS v", [f"{_q(col)} IS NOT NULL"], "ORDER BY v")["v"].tolist())
+
+    def unique_in_order(self, col):
+        return self._memo("unique_in_order", (col,), lambda: self._df(
+            f"{_q(col)} AS v", [f"{_q(col)} IS NOT NULL"], f"GROUP BY v ORDER BY min({ROW_ID})")["v"].tolist())
+
+    def top(self, col, n=5):
+        def compute():
+            df = self._df(f"{_q(col)}, count(*) AS Conteo", [f"{_q(col)} IS NOT NULL"],
+                          f"GROUP BY 1 ORDER BY Conteo DESC, min({ROW_ID}) LIMIT {int(n)}")
+            df.columns = [col, "Conteo"]
+            return df
+        return self._memo("top", (col, n), compute)
+
+    def category(self, col, top_n):
+        def compute():
+            v = f"trim(CAST({_q(col)} AS VARCHAR))"
+            df = self._df(f"{v} AS v, count(*) AS Conteo", [f"{_q(col)} IS NOT NULL", f"{v} <> ''"],
+                          f"GROUP BY 1 ORDER BY Conteo DESC, min({ROW_ID}) LIMIT {int(top_n)}")
+            df.columns = [col, "Conteo"]
+            return df
+        return self._memo("categoria", (col, top_n), compute)
+
+    def summary(self, dims):
+        def compute():
+            cols = ", ".join(_q(d) for d in dims)
+            df = self._df(f"{cols}, count(*) AS Conteo", [f"{_q(d)} IS NOT NULL" for d in dims],
+                          f"GROUP BY {cols} ORDER BY {cols}")
+            return df
+        return self._memo("resumen", tuple(dims), compute)
+
+    def sentiments(self):
+        def compute():
+            df = self._df(f"{_sentiment_expr()} AS s, count(*) AS Conteo", [f"{_q(SENTIMENT_COL)} IS NOT NULL"],
+                          f"GROUP BY 1 ORDER BY Conteo DESC, min({ROW_ID})")
+            df.columns = [SENTIMENT_COL, "Conteo"]
+            return df
+        return self._memo("sentimientos", (), compute)
+
+    def sentiment_rows(self, sentimiento, n):
+        df = self._df("*", [f"{_sentiment_expr()} = ?"], f"ORDER BY {ROW_ID} LIMIT {int(n)}", [sentimiento])
+        df[SENTIMENT_COL] = normalize_sentiment(df[SENTIMENT_COL])
+        return df.drop(columns=[ROW_ID])
+
+    def head(self, n):
+        return self.rows(0, n)
+
+    def rows(self, offset, limit):
+        return self._df("*", (), f"ORDER BY {ROW_ID} LIMIT {int(limit)} OFFSET {int(offset)}").drop(columns=[ROW_ID])
+
+    def to_frame(self):
+        return self._df("*", (), f"ORDER BY {ROW_ID}").drop(columns=[ROW_ID])
+
+
+class DuckDBBackend:
+    """Consolidado en Parquet consultado con DuckDB embebido (una conexión por proceso)."""
+    name = "duckdb"
+
+    def __init__(self, file=DEFAULT_FILE, valid_sheets=VALID_SHEETS):
+        digest = dataset_hash(file, valid_sheets)
+        parquet = CACHE_DIR / f"dataset-v{CACHE_VERSION}-{digest}.parquet"
+        meta = parquet.with_suffix(".json")
+        if not parquet.exists():
+            df, avisos = load_dataset(file, valid_sheets)
+            self._write_parquet(df, parquet)
+            meta.write_text(json.dumps({"avisos": avisos}, ensure_ascii=False), encoding="utf-8")
+        avisos = json.loads(meta.read_text(encoding="utf-8"))["avisos"] if meta.exists() else []
+        self._open(parquet, digest, avisos)
+
+    @classmethod
+    def from_frame(cls, df, digest, cache_dir=CACHE_DIR, avisos=()):
+        """Backend sobre un DataFrame ya normalizado, en `cache_dir`/<digest>.parquet (benchmarks y pruebas)."""
+        parquet = Path(cache_dir) / f"{digest}.parquet"
+        cls._write_parquet(df, parquet)
+        backend = cls.__new__(cls)
+        backend._open(parquet, digest, list(avisos))
+        return backend
+
+    def _open(self, parquet, digest, avisos):
+        import duckdb
+
+        self.digest, self.avisos = digest, avisos
+        self._con = duckdb.connect()
+        self._con.execute(f"CREATE VIEW consolidado AS SELECT * FROM read_parquet('{parquet.as_posix()}')")
+        self.columns = [c for c in self._con.execute("SELECT * FROM consolidado LIMIT 0").df().columns if c != ROW_ID]
+        self._local = threading.local()
+
+    @staticmethod
+    def _write_parquet(df, parquet):
+        import duckdb
+
+        parquet.parent.mkdir(parents=True, exist_ok=True)
+        out = df.copy()
+        # Parquet exige nombres de columna de texto (hay encabezados vacíos en alguna hoja)
+        out.columns = [str(c) for c in out.columns]
+        out[ROW_ID] = range(len(out))
+        tmp = parquet.with_suffix(".tmp")
+        con = duckdb.connect()
+        con.register("df_origen", out)
+        con.execute(f"COPY df_origen TO '{tmp.as_posix()}' (FORMAT PARQUET)")
+        con.close()
+        tmp.replace(parquet)
+
+    def query(self, sql, params=()):
+        # Un cursor por hilo: las sesiones de Streamlit corren en hilos distintos
+        cur = getattr(self._local, "cur", None)
+        if cur is None:
+            cur = self._local.cur = self._con.cursor()
+        return cur.execute(sql, list(params)).df()
+
+    def accepts_regex(self, pattern):
+        """Si RE2 compila `pattern` (filters.search_regex ya descarta lo que suele rechazar)."""
+        import duckdb
+
+        try:
+            self.query("SELECT regexp_matches('', ?, 'i') AS ok", [pattern])
+        except duckdb.Error:
+            return False
+        return True
+
+    def options(self, col):
+        if col not in self.columns:
+            return []
+        v = f"trim(CAST({_q(col)} AS VARCHAR))"
+        return aggregations.memoize((self.name, self.digest, "opciones", col), lambda: self.query(
+            f"SELECT DISTINCT {v} AS v FROM consolidado WHERE {_q(col)} IS NOT NULL AND {v} <> '' ORDER BY v")["v"].tolist())
+
+    def view(self):
+        return DuckDBView(self)
+
+    @cached_property
+    def index(self):
+        cols = [c for c in FILTER_COLUMNS if c in self.columns]
+        df = self.query(f"SELECT {', '.join([ROW_ID] + [_q(c) for c in cols])} FROM consolidado ORDER BY {ROW_ID}")
+        return FilterIndex(df, cols)
+
+    def preview_count(self, selections, query=""):
+        """Como PandasBackend.preview_count; con búsqueda por texto se cuenta en SQL."""
+        if query and len(query) >= MIN_QUERY_LEN:
+            vista = self.view()
+            for col, sel in selections.items():
+                vista = vista.filter(col, sel)
+            return vista.search(query).count()
+        return self.index.count(selections)
+
+
+# ================== SELECCIÓN ==================
+@lru_cache(maxsize=4)
+def _get_backend(name, file, valid_sheets, digest):
+    if name == "duckdb":
+        return DuckDBBackend(file, list(valid_sheets))
+    return PandasBackend(file, list(valid_sheets))
+
+
+def backend_name():
+    name = os.environ.get(ENV_BACKEND, "pandas").strip().lower()
+    return name if name in BACKENDS else "pandas"
+
+
+def get_backend(name=None, file=DEFAULT_FILE, valid_sheets=VALID_SHEETS):
+    """
+    Backend compartido por todas las sesiones del proceso; se recrea si cambia el Excel.
+    Si se pide duckdb y no está instalado, se usa pandas.
+    """
+    name = name or backend_name()
+    digest = dataset_hash(file, valid_sheets)
+    if name == "duckdb":
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            name = "pandas"
+    return _get_backend(name, str(file), tuple(valid_sheets), digest)
@@ -0,0 +1 @@
+"""Benchmarks del visualizador sobre libros sintéticos (ver benchmarks/run.py)."""
@@ -0,0 +1,277 @@
+# benchmarks/loadtest.py
+"""
+Prueba de carga con sesiones concurrentes de app.py, usando AppTest de Streamlit.
+
+Cada sesión es un AppTest independiente que ejecuta un guion de interacciones
+(filtros, búsqueda, widgets de cada pestaña, descarga del Excel, limpiar filtros)
+y se mide la latencia de cada paso. Todas las sesiones arrancan a la vez (barrera).
+
+AppTest reemplaza un singleton global (Runtime._instance) en cada ejecución, así
+que dos sesiones no pueden correr a la vez en el mismo proceso. Hay dos modos:
+    procesos  (por defecto) una sesión por proceso, en paralelo real. La memoria
+              por sesión es el aumento de RSS de cada proceso tras el precalentamiento.
+    hilos     todas las sesiones en un proceso, como en el servidor, con los reruns
+              serializados por un candado (la espera cuenta como latencia). La
+              memoria por sesión es el aumento de RSS del proceso dividido por N.
+
+GeoBoundaries se reemplaza por un GeoJSON sintético: la prueba no usa la red. Cada
+proceso usa cachés en disco temporales (no toca .cache/), así que el precalentamiento
+de cada nivel vuelve a leer el Excel; eso ocurre antes de medir.
+
+Uso:
+    python -m benchmarks.loadtest --sessions 1 5 10 20 -o loadtest.json
+    python -m benchmarks.loadtest --sessions 10 --modo hilos
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from dataset import BASE_DIR
+
+APP_PATH = str(BASE_DIR / "app.py")
+DEPARTAMENTOS = ["Tolima", "Huila", "Putumayo", "Caquetá"]
+BUSQUEDAS = ["turismo", "hotel", "cultura", "río", "festival"]
+
+
+def _rss_mb():
+    """Memoria residente actual del proceso (Linux: /proc; otros: pico vía getrusage)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 1024)
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+def stub_geoboundaries(tmpdir):
+    """Sustituye la descarga de GeoBoundaries por el GeoJSON sintético de los benchmarks."""
+    import geo
+    from benchmarks.synthetic import synthetic_geojson
+
+    geojson = synthetic_geojson()
+
+    def fake_get(url, *args, **kwargs):
+        if url == geo.GEOBOUNDARIES_URL:
+            return _FakeResponse({"gjDownloadURL": "stub://geoboundaries/COL_ADM1.geojson"})
+        return _FakeResponse(geojson)
+
+    geo.requests.get = fake_get
+    geo.GEOJSON_CACHE = Path(tmpdir) / "geoboundaries_stub.geojson"
+    geo.clear_cache()
+
+
+def isolate_caches(tmpdir):
+    """
+    Todas las cachés en disco en `tmpdir`: lo que se calcula con el GeoJSON sintético
+    (mapas de los presets, por ejemplo) no debe quedar en el .cache/ de la app.
+    """
+    import backends
+    import dataset
+    import gallery
+    import geo
+    import presets
+
+    cache_dir = Path(tmpdir) / "cache"
+    for mod in (dataset, backends, geo, presets):
+        mod.CACHE_DIR = cache_dir
+    gallery.THUMB_DIR = cache_dir / "thumbs"
+
+
+def _select_last(widget):
+    """Elige la última opción del selectbox; si no tiene opciones (sin filas), solo rerun."""
+    return widget.select_index(len(widget.options) - 1) if widget.options else widget
+
+
+def _download(at):
+    """
+    Clic en "Descargar datos filtrados": el rerun del botón y la generación del Excel.
+    AppTest no ejecuta el callable diferido del botón (su MediaFileManager se descarta
+    al terminar cada rerun), así que el Excel se genera aquí con los filtros aplicados.
+    """
+    from backends import get_backend
+    from dataset import export_excel
+    from presets import preset_view
+
+    at.run()
+    selecciones, query = at.session_state["filtros_aplicados"]
+    vista = preset_view(get_backend(), {"selections": selecciones, "query": query})
+    if vista.count():
+        export_excel(vista.to_frame())
+    return at
+
+
+def _script(rng):
+    """Guion de una sesión: lista de (paso, acción sobre el AppTest), con los filtros en lote."""
+    depto = rng.choice(DEPARTAMENTOS)
+    query = rng.choice(BUSQUEDAS)
+    return [
+        ("carga inicial", lambda at: at.run()),
+        ("filtro Departamento", lambda at: at.multiselect(key="depto").select(depto).run()),
+        ("filtro Aspecto", lambda at: at.multiselect(key="aspecto").select(rng.choice(at.multiselect(key="aspecto").options)).run()),
+        ("búsqueda por texto", lambda at: at.text_input(key="busqueda").input(query).run()),
+        # "Aplicar filtros" del modo en lote: los pasos anteriores solo ejecutan el fragmento
+        ("aplicar filtros", lambda at: at.button(key="aplicar").click().run()),
+        # Cambiar de pestaña no ejecuta el script (es del navegador): se ejercitan los widgets de cada pestaña
+        ("pestaña Barras: categoría", lambda at: _select_last(at.selectbox(key="barras_col")).run()),
+        ("pestaña Barras: Top N", lambda at: at.slider(key="barras_top").set_value(50).run()),
+        ("pestaña Sentimientos", lambda at: _select_last(at.selectbox(key="sentimiento_sel")).run()),
+        ("descarga", _download),
+        ("limpiar filtros", lambda at: at.button(key="limpiar").click().run()),
+    ]
+
+
+def _session(seed, timeout, barrier, lock=None):
+    """Ejecuta el guion de una sesión. Devuelve (pasos, inicio, fin) con tiempos de reloj."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    barrier.wait()
+    start = time.time()
+    steps = []
+    for name, action in _script(rng):
+        t0 = time.perf_counter()
+        try:
+            with lock or nullcontext():
+                action(at)
+            errors = [str(e.value) for e in at.exception]
+        except Exception as e:  # el guion no encontró un widget: se reporta y se sigue
+            errors = [f"{name}: {type(e).__name__}: {e}"]
+        elapsed = time.perf_counter() - t0
+        steps.append({"step": name, "s": elapsed, "errors": errors})
+    return steps, start, time.time()
+
+
+def _prepare_process(tmpdir):
+    import logging
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    isolate_caches(tmpdir)
+    stub_geoboundaries(tmpdir)
+    # Calentar cachés del proceso (como hace warmup.py en producción) antes de medir
+    from warmup import warm_up
+    warm_up(report=lambda _msg: None)
+
+
+def _process_session(seed, timeout, barrier):
+    """Una sesión en su propio proceso (modo `procesos`)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _prepare_process(tmpdir)
+        rss_before = _rss_mb()
+        steps, start, end = _session(seed, timeout, barrier)
+        return steps, start, end, _rss_mb() - rss_before
+
+
+def _thread_sessions(sessions, timeout, seed):
+    """Todas las sesiones en este proceso (modo `hilos`), reruns serializados."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _prepare_process(tmpdir)
+        rss_before = _rss_mb()
+        barrier, lock = threading.Barrier(sessions), threading.Lock()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            results = list(pool.map(lambda i: _session(seed + i, timeout, barrier, lock), range(sessions)))
+        # Las sesiones siguen vivas (como en el servidor): medir antes de liberarlas
+        per_session = (_rss_mb() - rss_before) / sessions
+    return [(steps, start, end, per_session) for steps, start, end in results]
+
+
+def _percentiles(values):
+    if len(values) < 2:
+        v = values[0] if values else float("nan")
+        return {"p50": v, "p95": v, "p99": v}
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+
+def run_level(sessions, mode="procesos", timeout=120, seed=0):
+    """Corre `sessions` sesiones concurrentes y devuelve sus métricas agregadas."""
+    ctx = get_context("spawn")
+    if mode == "procesos":
+        with ctx.Manager() as manager, \
+                ProcessPoolExecutor(max_workers=sessions, mp_context=ctx) as pool:
+            barrier = manager.Barrier(sessions)
+            futures = [pool.submit(_process_session, seed + i, timeout, barrier) for i in range(sessions)]
+            results = [f.result() for f in futures]
+    else:
+        # Proceso nuevo: memoria y cachés de Streamlit limpias para cada nivel
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results = pool.submit(_thread_sessions, sessions, timeout, seed).result()
+
+    wall = max(end for _, _, end, _ in results) - min(start for _, start, _, _ in results)
+    steps = [s for sess_steps, _, _, _ in results for s in sess_steps]
+    latencies = [s["s"] for s in steps]
+    by_step = {}
+    for s in steps:
+        by_step.setdefault(s["step"], []).append(s["s"])
+    rss = [mb for _, _, _, mb in results]
+    return {
+        "sessions": sessions,
+        "mode": mode,
+        "reruns": len(steps),
+        "errors": sorted({e for s in steps for e in s["errors"]}),
+        "wall_s": wall,
+        "throughput_rps": len(steps) / wall,
+        "latency_s": {**_percentiles(latencies), "mean": statistics.fmean(latencies), "max": max(latencies)},
+        "latency_by_step_s": {k: _percentiles(v) for k, v in by_step.items()},
+        "rss_mb_per_session": {"mean": statistics.fmean(rss), "max": max(rss)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de app.py con sesiones AppTest concurrentes.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10],
+                        help="niveles de concurrencia (número de sesiones simultáneas)")
+    parser.add_argument("--modo", choices=["procesos", "hilos"], default="procesos",
+                        help="una sesión por proceso (paralelo real) o todas en un proceso")
+    parser.add_argument("--timeout", type=float, default=120, help="tiempo máximo por rerun (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="loadtest.json", help="archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    levels = []
+    print(f"{'sesiones':>8} {'reruns':>7} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'MB/sesión':>10}")
+    for n in args.sessions:
+        level = run_level(n, args.modo, args.timeout, args.seed)
+        levels.append(level)
+        lat = level["latency_s"]
+        print(f"{n:>8} {level['reruns']:>7} {level['throughput_rps']:>7.2f} "
+              f"{lat['p50'] * 1000:>9.1f} {lat['p95'] * 1000:>9.1f} {lat['p99'] * 1000:>9.1f} "
+              f"{level['rss_mb_per_session']['mean']:>10.1f}")
+        for err in level["errors"]:
+            print(f"         ⚠️ {err}")
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump({
+            "meta": {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "args": vars(args)},
+            "levels": levels,
+        }, fh, ensure_ascii=False, indent=2)
+    print(f"\nResultados en {args.output}")
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
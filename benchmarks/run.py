@@ -0,0 +1,228 @@
+# benchmarks/run.py
+"""
+Benchmarks de las etapas del visualizador sobre libros sintéticos de distintos tamaños.
+
+Mide read_excel_all y normalize_columns y, por cada backend (backends.py), la cadena
+de filtros, la búsqueda por texto, la vista previa de los filtros, las agregaciones de
+las pestañas, la exportación a Excel y la construcción del mapa: el mismo camino que
+usa la app. Los resultados se escriben en JSON para comparar corridas antes y después
+de un cambio, o pandas contra DuckDB.
+
+Uso:
+    python -m benchmarks.run --sizes 1000 10000 100000 -o bench.json
+    python -m benchmarks.run --sizes 1000000 --max-excel-rows 0 -o bench_1m.json
+    python -m benchmarks.run --sizes 10000 -o nuevo.json --compare bench.json
+    python -m benchmarks.run --sizes 100000 1000000 --max-excel-rows 0 --backend pandas duckdb
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+import aggregations
+from backends import BACKENDS, DuckDBBackend, PandasBackend
+from benchmarks.synthetic import generate_frame, synthetic_geojson, write_workbook
+from dataset import BASE_DIR, VALID_SHEETS, export_excel, normalize_columns, read_excel_all
+from geo import build_map
+
+# Selección representativa del sidebar y consultas de texto (frecuente y sin coincidencias)
+SELECCION = {
+    "Departamento": ["Huila", "Tolima"],
+    "Enfoque Turístico": ["Cultural", "Naturaleza"],
+    "Aspecto": ["Seguridad", "Infraestructura", "Servicios"],
+}
+CONSULTAS = {"busqueda_frecuente": "cascada", "busqueda_sin_resultados": "zzzz"}
+DIMS = ("Departamento", "Aspecto", "Enfoque Turístico")
+
+
+def _measure(fn, repeat, setup=None):
+    """Ejecuta fn(setup()) `repeat` veces; solo se mide fn. Devuelve (tiempos, último resultado)."""
+    times, result = [], None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        result = fn(arg) if setup else fn()
+        times.append(time.perf_counter() - t0)
+    return times, result
+
+
+def _rows_of(result):
+    if isinstance(result, int):
+        return result
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, (bytes, str)):
+        return len(result)
+    return None
+
+
+def bench_size(rows, repeat, max_excel_rows, max_export_rows, seed, workdir, backends=("pandas",), log=print):
+    """Corre todas las etapas para un tamaño y devuelve la lista de resultados."""
+    results = []
+
+    def record(stage, times, result=None, **extra):
+        entry = {
+            "rows": rows, "stage": stage, "repeat": len(times),
+            "min_s": min(times), "median_s": statistics.median(times), "mean_s": statistics.fmean(times),
+            "output": _rows_of(result), **extra,
+        }
+        results.append(entry)
+        log(f"{rows:>10,}  {stage:<26} {entry['median_s'] * 1000:>11.2f} ms")
+
+    # --- Ingesta: desde .xlsx cuando el tamaño lo permite, si no directamente en memoria ---
+    if rows <= max_excel_rows:
+        path = Path(workdir) / f"sintetico_{rows}.xlsx"
+        t0 = time.perf_counter()
+        write_workbook(path, rows, seed)
+        gen_s = time.perf_counter() - t0
+        times, raw = _measure(lambda: read_excel_all(path, VALID_SHEETS), repeat)
+        record("read_excel_all", times, raw, file_mb=round(path.stat().st_size / 2**20, 2),
+               generate_s=round(gen_s, 3))
+    else:
+        raw = generate_frame(rows, seed)
+
+    times, df = _measure(normalize_columns, repeat, setup=raw.copy)
+    record("normalize_columns", times, df)
+
+    for name in backends:
+        results += bench_backend(name, df, rows, repeat, max_export_rows, seed, workdir, log)
+
+    return results
+
+
+def bench_backend(name, df, rows, repeat, max_export_rows, seed, workdir, log=print):
+    """
+    Etapas de la app a través de un backend (backends.py): filtros, búsqueda, agregaciones,
+    exportación y mapa. La caché de agregaciones se vacía antes de cada repetición.
+    """
+    results = []
+
+    def record(stage, times, result=None, **extra):
+        entry = {
+            "rows": rows, "backend": name, "stage": stage, "repeat": len(times),
+            "min_s": min(times), "median_s": statistics.median(times), "mean_s": statistics.fmean(times),
+            "output": _rows_of(result), **extra,
+        }
+        results.append(entry)
+        log(f"{rows:>10,}  {name:<7} {stage:<26} {entry['median_s'] * 1000:>11.2f} ms")
+
+    def measure(fn):
+        return _measure(lambda _: fn(), repeat, setup=aggregations.clear_cache)
+
+    digest = f"sintetico-{rows}-{seed}"
+    t0 = time.perf_counter()
+    backend = (DuckDBBackend.from_frame(df, digest, workdir) if name == "duckdb"
+               else PandasBackend.from_frame(df, digest))
+    record("carga_backend", [time.perf_counter() - t0])
+
+    def filtrada():
+        vista = backend.view()
+        for col, sel in SELECCION.items():
+            vista = vista.filter(col, sel)
+        return vista
+
+    times, n = measure(lambda: filtrada().count())
+    record("cadena_filtros", times, n)
+
+    for stage, query in CONSULTAS.items():
+        times, n = measure(lambda: backend.view().search(query).count())
+        record(stage, times, n)
+
+    times, n = measure(lambda: backend.preview_count(SELECCION))
+    record("vista_previa", times, n)
+
+    vista = backend.view()
+    aggs = {
+        "agg_top5_aspecto": lambda: vista.top("Aspecto", 5),
+        "agg_barras_enfoque_top20": lambda: vista.category("Enfoque Turístico", 20),
+        "agg_resumen_dims": lambda: vista.summary(DIMS),
+        "agg_sentimientos": lambda: vista.sentiments(),
+    }
+    for stage, fn in aggs.items():
+        times, res = measure(fn)
+        record(stage, times, res)
+
+    # Materializar las filas filtradas forma parte de la exportación (en DuckDB es una consulta)
+    times, res = measure(lambda: export_excel(filtrada().rows(0, max_export_rows)))
+    record("exportar_excel", times, res, input_rows=min(filtrada().count(), max_export_rows))
+
+    geojson = synthetic_geojson()
+    departamentos = filtrada().unique_in_order("Departamento")
+    times, res = _measure(lambda: build_map(geojson, departamentos).get_root().render(), repeat)
+    record("mapa_folium", times, res)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path, log=print):
+    """Imprime la razón actual/base de la mediana por (tamaño, etapa)."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        base = {(r["rows"], r.get("backend"), r["stage"]): r for r in json.load(fh)["results"]}
+    log(f"\nComparación con {baseline_path} (mediana actual / base):")
+    for r in current:
+        b = base.get((r["rows"], r.get("backend"), r["stage"]))
+        if b and b["median_s"] > 0:
+            ratio = r["median_s"] / b["median_s"]
+            flag = "  ⚠️" if ratio > 1.1 else ""
+            log(f"{r['rows']:>10,}  {r.get('backend') or '':<7} {r['stage']:<26} {ratio:>6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del visualizador con libros sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="número de filas por corrida")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-excel-rows", type=int, default=100_000,
+                        help="por encima de este tamaño no se escribe/lee el .xlsx (la ingesta se omite)")
+    parser.add_argument("--max-export-rows", type=int, default=50_000,
+                        help="límite de filas para medir la exportación a Excel")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=["pandas"],
+                        help="backends a medir (varios para compararlos en la misma corrida)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench.json", help="archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            results += bench_size(rows, args.repeat, args.max_excel_rows, args.max_export_rows,
+                                  args.seed, workdir, args.backend)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
+    print(f"\nResultados en {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# benchmarks/synthetic.py
+"""
+Generador de libros sintéticos con el formato del consolidado de turismo.
+
+Replica las cuatro hojas "Cod …", los mismos encabezados, longitudes de texto
+parecidas a las reales y una fracción de celdas con hipervínculo.
+
+Uso:
+    python -m benchmarks.synthetic --rows 100000 -o data/sintetico_100k.xlsx
+"""
+import argparse
+import time
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+# Hoja -> departamento, con el peso aproximado de cada hoja en el consolidado real
+SHEETS = {
+    "Cod Tol": ("Tolima", 0.27),
+    "Cod Putumayo": ("Putumayo", 0.20),
+    "Cod Huila": ("Huila", 0.28),
+    "Cod Caquetá": ("Caquetá", 0.25),
+}
+HEADERS = [
+    "Departamento", "Enfoque Turístico", "Aspecto", "Título", "Descripción",
+    "Aporte a la Investigación", "Fuente", "Sentimiento identificado",
+]
+
+ENFOQUES = {"Cultural": 0.50, "Otro": 0.16, "Aventura": 0.15, "Naturaleza": 0.14, "Salud y Bienestar": 0.05}
+ASPECTOS = {
+    "Seguridad": 0.21, "Infraestructura": 0.19, "Servicios": 0.16, "Atractivos": 0.13,
+    "Planta Turística": 0.08, "Conectividad": 0.08, "Sostenibilidad": 0.06,
+    "Condiciones Básicas": 0.05, "Otro": 0.04,
+}
+SENTIMIENTOS = {"Muy positivo": 0.84, "Positivo": 0.07, "Negativo": 0.065, "Neutro": 0.015, "Muy negativo": 0.01}
+FUENTES = ["Fontur", "Acotur", "Caqueta Travel", "MinCIT", "Gobernación", "Alcaldía", "El Tiempo", "Procolombia"]
+
+VOCABULARIO = (
+    "turismo región comunidad naturaleza cultura patrimonio ecoturismo sostenible desarrollo "
+    "proyecto oferta experiencia municipio departamento visitantes hotel ruta río parque reserva "
+    "biodiversidad aves café gastronomía festival artesanía indígena campesina infraestructura vía "
+    "seguridad conectividad servicios atractivo operador guía capacitación promoción mercado "
+    "inversión fortalecimiento identidad territorio paisaje montaña selva cascada sendero "
+    "amazonía andes cañón desierto termales bienestar aventura rafting senderismo alojamiento"
+).split()
+
+# Longitud media en palabras, aproximada a partir de los caracteres del consolidado real
+LONGITUDES = {"Título": (8, 3), "Descripción": (62, 25), "Aporte a la Investigación": (23, 8)}
+TEXT_POOL = 4096
+
+
+def _texts(rng, n_words_mean, n_words_sd, size):
+    n = np.clip(rng.normal(n_words_mean, n_words_sd, size).astype(int), 2, None)
+    vocab = np.array(VOCABULARIO)
+    return [" ".join(rng.choice(vocab, k)).capitalize() + "." for k in n]
+
+
+def _choice(rng, weights, size):
+    values = list(weights)
+    p = np.array(list(weights.values()), dtype=float)
+    return rng.choice(values, size, p=p / p.sum())
+
+
+def generate_sheets(rows, seed=0, hyperlink_share=0.75):
+    """
+    {hoja: DataFrame} con `rows` filas en total, en el mismo formato que produce
+    dataset.read_excel_all por hoja (texto visible + columnas '<encabezado>_URL').
+    """
+    rng = np.random.default_rng(seed)
+    # Banco de textos reutilizable: generar millones de párrafos únicos no aporta al benchmark
+    pool = {col: np.array(_texts(rng, m, sd, TEXT_POOL)) for col, (m, sd) in LONGITUDES.items()}
+
+    sheets = {}
+    pesos = np.array([w for _, w in SHEETS.values()])
+    counts = rng.multinomial(rows, pesos / pesos.sum())
+    offset = 0
+    for (sheet, (depto, _)), n in zip(SHEETS.items(), counts):
+        idx = np.arange(offset, offset + n)
+        offset += n
+        fuente = rng.choice(FUENTES, n)
+        data = {
+            "Departamento": np.full(n, depto, dtype=object),
+            "Enfoque Turístico": _choice(rng, ENFOQUES, n),
+            "Aspecto": _choice(rng, ASPECTOS, n),
+            "Título": [f"{t[:-1]} {i}" for t, i in zip(rng.choice(pool["Título"], n), idx)],
+            "Descripción": rng.choice(pool["Descripción"], n),
+            "Descripción_URL": np.where(rng.random(n) < 0.01, [f"https://noticias.example.co/{i}" for i in idx], None),
+            "Aporte a la Investigación": rng.choice(pool["Aporte a la Investigación"], n),
+            "Fuente": fuente,
+            "Fuente_URL": np.where(rng.random(n) < hyperlink_share,
+                                   [f"https://www.{f.lower().replace(' ', '')}.example.co/r/{i}" for f, i in zip(fuente, idx)],
+                                   None),
+            "Sentimiento identificado": _choice(rng, SENTIMIENTOS, n),
+        }
+        sheets[sheet] = pd.DataFrame(data)
+    return sheets
+
+
+def generate_frame(rows, seed=0, hyperlink_share=0.75):
+    """El equivalente de read_excel_all sobre el libro sintético, sin pasar por el .xlsx."""
+    return pd.concat(generate_sheets(rows, seed, hyperlink_share).values(), ignore_index=True)
+
+
+def write_workbook(path, rows, seed=0, hyperlink_share=0.75):
+    """Escribe el libro sintético (modo write-only de openpyxl, apto para millones de filas)."""
+    wb = Workbook(write_only=True)
+    for sheet, df in generate_sheets(rows, seed, hyperlink_share).items():
+        ws = wb.create_sheet(sheet)
+        ws.append(HEADERS)
+        textos = zip(*(df[h].to_numpy() for h in HEADERS))
+        enlaces = zip(*(
+            df[f"{h}_URL"].to_numpy() if f"{h}_URL" in df.columns else repeat(None, len(df))
+            for h in HEADERS
+        ))
+        for values, urls in zip(textos, enlaces):
+            row = []
+            for value, url in zip(values, urls):
+                if isinstance(url, str):
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.hyperlink = url
+                    row.append(cell)
+                else:
+                    row.append(value)
+            ws.append(row)
+    wb.save(path)
+    return path
+
+
+def synthetic_geojson():
+    """FeatureCollection mínima (un rectángulo por departamento) para medir el mapa sin red."""
+    boxes = {
+        "Tolima": (-75.9, 3.6, -74.5, 5.3), "Huila": (-76.6, 1.5, -74.4, 3.8),
+        "Putumayo": (-77.2, -0.3, -74.0, 1.4), "Caquetá": (-76.3, -0.7, -71.5, 2.9),
+    }
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"shapeName": name},
+                "geometry": {"type": "Polygon", "coordinates": [[
+                    [x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0],
+                ]]},
+            }
+            for name, (x0, y0, x1, y1) in boxes.items()
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un libro sintético con el formato del consolidado.")
+    parser.add_argument("--rows", type=int, default=10_000, help="filas totales (repartidas en las 4 hojas)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hyperlink-share", type=float, default=0.75,
+                        help="fracción de celdas 'Fuente' con hipervínculo")
+    parser.add_argument("-o", "--output", required=True, help="ruta del .xlsx de salida")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    write_workbook(args.output, args.rows, args.seed, args.hyperlink_share)
+    print(f"{args.output}: {args.rows:,} filas en {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
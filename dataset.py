@@ -0,0 +1,155 @@
+# dataset.py
+"""
+Carga y normalización del consolidado de turismo.
+
+No depende de Streamlit: lo usan tanto app.py como las herramientas de línea de
+comandos (precalentamiento, benchmarks, reportes). El DataFrame resultante se
+guarda en memoria a nivel de proceso y en disco (.cache/), de modo que solo el
+primer proceso que ve una versión del Excel paga el costo de leerlo.
+"""
+import hashlib
+import io
+import pickle
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".cache"
+# Subir al cambiar read_excel_all/normalize_columns para invalidar los pickles en disco
+CACHE_VERSION = 1
+
+DEFAULT_FILE = BASE_DIR / "data" / "consolidado_turismo LOTE 1 final.xlsx"
+
+# ✅ Lista de hojas válidas
+VALID_SHEETS = ["Cod Tol", "Cod Putumayo", "Cod Huila", "Cod Caquetá"]
+
+
+def read_excel_all(file: Path, valid_sheets, avisos=None) -> pd.DataFrame:
+    """
+    Lee todas las hojas de un Excel e incluye tanto el texto visible como los hipervínculos.
+    Si una celda contiene un enlace, se crea una columna adicional con el sufijo '_URL'.
+    Las hojas omitidas se reportan en `avisos` (lista) para que la interfaz las muestre.
+    """
+    avisos = avisos if avisos is not None else []
+    wb = load_workbook(file, data_only=True)
+    df_list = []
+
+    for sheet in valid_sheets:
+        if sheet not in wb.sheetnames:
+            avisos.append(f"⚠️ La hoja '{sheet}' no existe en el archivo.")
+            continue
+
+        ws = wb[sheet]
+
+        # Obtener encabezados
+        headers = [cell.value for cell in ws[1]]
+        if not headers:
+            avisos.append(f"⚠️ La hoja '{sheet}' no tiene encabezados válidos.")
+            continue
+
+        data = []
+        for row in ws.iter_rows(min_row=2, max_col=len(headers)):
+            values = []
+            for cell in row:
+                text = cell.value
+                url = cell.hyperlink.target if cell.hyperlink else None
+                values.append((text, url))
+            data.append(values)
+
+        # Crear diccionario: texto + posibles URLs
+        df_dict = {}
+        for j, header in enumerate(headers):
+            # Texto visible
+            df_dict[header] = [data[i][j][0] for i in range(len(data))]
+            # Enlace si existe
+            urls = [data[i][j][1] for i in range(len(data))]
+            if any(urls):
+                df_dict[f"{header}_URL"] = urls
+
+        df_temp = pd.DataFrame(df_dict)
+        df_list.append(df_temp)
+
+    if not df_list:
+        raise ValueError("No se pudieron leer las hojas especificadas.")
+
+    df = pd.concat(df_list, ignore_index=True)
+    return df
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.str.strip()
+    aliases = {
+        "DEPARTAMENTO": "Departamento",
+        "Departamento ": "Departamento",
+        "MUNICIPIO": "Municipio",
+        "ENFOQUE TURÍSTICO": "Enfoque Turístico",
+        "ENFOQUE TURISTICO": "Enfoque Turístico",
+        "DESCRIPCIÓN": "Descripción",
+        "Descripcion": "Descripción",
+        "TITULO": "Título",
+        "ACTOR": "Actor",
+        "SECTOR": "Sector",
+        "ASPECTO": "Aspecto",
+        "NOMBRE": "Nombre",
+    }
+    df.rename(columns={k: v for k, v in aliases.items() if k in df.columns}, inplace=True)
+    # Solo las columnas de texto pueden traer espacios sobrantes
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].map(lambda x: x.strip() if isinstance(x, str) else x)
+    return df
+
+
+@lru_cache(maxsize=8)
+def _file_hash(file: str, mtime_ns: int, size: int, valid_sheets: tuple) -> str:
+    h = hashlib.sha256()
+    with open(file, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    h.update("|".join(valid_sheets).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def dataset_hash(file: Path = DEFAULT_FILE, valid_sheets=VALID_SHEETS) -> str:
+    """Huella del contenido del Excel y de las hojas leídas (se recalcula solo si cambia el archivo)."""
+    st_ = Path(file).stat()
+    return _file_hash(str(file), st_.st_mtime_ns, st_.st_size, tuple(valid_sheets))
+
+
+@lru_cache(maxsize=4)
+def _load_dataset(file: str, valid_sheets: tuple, digest: str):
+    cache_file = CACHE_DIR / f"dataset-v{CACHE_VERSION}-{digest}.pkl"
+    if cache_file.exists():
+        try:
+            with open(cache_file, "rb") as fh:
+                return pickle.load(fh)
+        except Exception:
+            cache_file.unlink(missing_ok=True)
+
+    avisos = []
+    df = normalize_columns(read_excel_all(Path(file), list(valid_sheets), avisos))
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = cache_file.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        pickle.dump((df, avisos), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(cache_file)
+    return df, avisos
+
+
+def load_dataset(file: Path = DEFAULT_FILE, valid_sheets=VALID_SHEETS):
+    """
+    Devuelve (df, avisos) con el consolidado ya normalizado.
+    El DataFrame es compartido por todas las sesiones del proceso: no modificarlo en el lugar.
+    """
+    return _load_dataset(str(file), tuple(valid_sheets), dataset_hash(file, valid_sheets))
+
+
+def export_excel(df: pd.DataFrame, sheet_name="Datos Filtrados") -> bytes:
+    """Convierte el DataFrame filtrado a un .xlsx en memoria (botón de descarga)."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
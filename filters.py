@@ -0,0 +1,106 @@
+# filters.py
+"""
+Filtros del sidebar y búsqueda por texto sobre el consolidado.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Columnas que alimentan los multiselect del sidebar, en orden
+FILTER_COLUMNS = ["Departamento", "Municipio", "Enfoque Turístico", "Aspecto", "Sector"]
+SEARCH_COLUMNS = ["Nombre", "Actor", "Título", "Descripción"]
+MIN_QUERY_LEN = 2
+
+
+def available(col, df): return col in df.columns
+def options_sorted(series): return sorted([x for x in series.dropna().astype(str).str.strip().unique() if x != ""])
+def filter_by_selection(df, col, selected):
+    if available(col, df) and selected:
+        return df[df[col].isin(selected)]
+    return df
+
+
+# Construcciones de `re` que RE2 (el motor de DuckDB) no admite: lookaround, referencias
+# hacia atrás, grupos atómicos, condicionales y cuantificadores posesivos
+_SOLO_PYTHON = re.compile(r"\(\?(?:[=!>(]|<[=!]|P=)|\\[1-9]|[*+?}]\+")
+
+
+def search_regex(query):
+    """
+    La búsqueda es una expresión regular (p. ej. "hotel|hostal"); si `query` no es una
+    expresión válida (p. ej. "(hotel") o usa algo que RE2 no admite (p. ej. "(?=hotel)"),
+    se busca el texto literal y se devuelve None. Así ambos backends buscan lo mismo.
+    """
+    try:
+        re.compile(query)
+    except re.error:
+        return None
+    return None if _SOLO_PYTHON.search(query) else query
+
+
+def search_mask(df, query):
+    """Máscara de las filas donde alguna columna de búsqueda contiene `query`; None si no se busca."""
+    search_cols = [c for c in SEARCH_COLUMNS if available(c, df)]
+    if not (query and len(query) >= MIN_QUERY_LEN and search_cols):
+        return None
+    regex = search_regex(query) is not None
+    mask = pd.Series(False, index=df.index)
+    for c in search_cols:
+        mask = mask | df[c].fillna("").astype(str).str.contains(query, case=False, na=False, regex=regex)
+    return mask
+
+
+def search_text(df, query):
+    """Conserva las filas donde alguna columna de búsqueda contiene `query` (sin distinguir mayúsculas)."""
+    mask = search_mask(df, query)
+    return df if mask is None else df[mask]
+
+
+def filter_signature(digest, selections, query=""):
+    """Clave hashable que identifica un resultado filtrado (versión del dataset + selección + texto)."""
+    sel = tuple((col, tuple(sorted(selections.get(col) or ()))) for col in FILTER_COLUMNS)
+    q = query if query and len(query) >= MIN_QUERY_LEN else ""
+    return (digest, sel, q)
+
+
+def apply_explorer_filters(df, filtros):
+    """Filtros propios de la pestaña del mapa ({dimensión: valores seleccionados})."""
+    for dim, seleccion in filtros.items():
+        if seleccion:
+            df = df[df[dim].isin(seleccion)]
+    return df
+
+
+def explorer_signature(signature, filtros):
+    return (signature, tuple((dim, tuple(seleccion)) for dim, seleccion in filtros.items()))
+
+
+class FilterIndex:
+    """
+    Códigos por fila de cada columna del sidebar (pd.factorize), para contar cuántas
+    filas deja una selección sin filtrar el DataFrame (vista previa de los filtros).
+    """
+
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.n = len(df)
+        self.codes = {}
+        for col in columns:
+            if available(col, df):
+                codes, uniques = pd.factorize(df[col])
+                self.codes[col] = (codes, {v: i for i, v in enumerate(uniques)})
+
+    def mask(self, selections):
+        mask = np.ones(self.n, dtype=bool)
+        for col, selected in selections.items():
+            if selected and col in self.codes:
+                codes, lookup = self.codes[col]
+                mask &= np.isin(codes, [lookup[v] for v in selected if v in lookup])
+        return mask
+
+    def count(self, selections, extra_mask=None):
+        """Filas que cumplen `selections` (y `extra_mask`, p. ej. la búsqueda por texto)."""
+        mask = self.mask(selections)
+        if extra_mask is not None:
+            mask &= np.asarray(extra_mask, dtype=bool)
+        return int(mask.sum())
@@ -0,0 +1,45 @@
+# gallery.py
+"""
+Miniaturas de la galería de imágenes, recortadas una sola vez y guardadas en .cache/thumbs.
+"""
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageOps
+
+from dataset import BASE_DIR, CACHE_DIR
+
+CARPETA_IMAGENES = BASE_DIR / "data" / "imagenes"
+THUMB_SIZE = (300, 180)
+THUMB_DIR = CACHE_DIR / "thumbs"
+
+
+def list_images(carpeta=CARPETA_IMAGENES):
+    return [
+        os.path.join(carpeta, img)
+        for img in sorted(os.listdir(carpeta))
+        if img.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))
+    ]
+
+
+@lru_cache(maxsize=64)
+def _thumbnail(abs_path: str, mtime_ns: int, size: tuple) -> Image.Image:
+    name = f"{os.path.splitext(os.path.basename(abs_path))[0]}-{mtime_ns}-{size[0]}x{size[1]}.png"
+    cached = THUMB_DIR / name
+    if cached.exists():
+        img = Image.open(cached)
+        img.load()
+        return img
+
+    img = Image.open(abs_path)
+    img = ImageOps.fit(img, size, Image.LANCZOS, centering=(0.5, 0.5))
+    if img.mode not in ("RGB", "RGBA", "L", "P"):
+        img = img.convert("RGB")
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
+    img.save(cached)
+    return img
+
+
+def thumbnail(img_path, size=THUMB_SIZE) -> Image.Image:
+    abs_path = os.path.abspath(img_path)
+    return _thumbnail(abs_path, os.stat(abs_path).st_mtime_ns, tuple(size))
@@ -0,0 +1,185 @@
+# geo.py
+"""
+Límites departamentales (GeoBoundaries) con caché en memoria y en disco,
+coordenadas de municipios y construcción del mapa folium del explorador.
+"""
+import json
+import threading
+import time
+
+import folium
+import requests
+
+from dataset import CACHE_DIR
+
+GEOBOUNDARIES_URL = "https://www.geoboundaries.org/api/current/gbOpen/COL/ADM1"
+GEOJSON_CACHE = CACHE_DIR / "geoboundaries_COL_ADM1.geojson"
+# Tras un fallo no se vuelve a intentar la descarga hasta pasados estos segundos: el
+# mapa se pinta en cada rerun y cada intento puede tardar hasta 90 s (timeouts 30 + 60)
+REINTENTO_S = 120
+
+_geojson = {}  # "datos": GeoJSON descargado | "fallo": (time.monotonic(), mensaje)
+_lock = threading.Lock()
+
+
+class GeoBoundariesError(RuntimeError):
+    """No fue posible obtener los límites departamentales."""
+
+
+# -------------------------------
+# Cargar GeoJSON de departamentos desde GeoBoundaries
+# -------------------------------
+def cargar_departamentos():
+    """
+    GeoJSON de los departamentos (memoria, luego .cache/, luego GeoBoundaries).
+    Lanza GeoBoundariesError; el fallo se recuerda REINTENTO_S segundos.
+    """
+    with _lock:
+        if "datos" in _geojson:
+            return _geojson["datos"]
+        fallo = _geojson.get("fallo")
+        if fallo and time.monotonic() - fallo[0] < REINTENTO_S:
+            raise GeoBoundariesError(fallo[1])
+        try:
+            geojson = _descargar_departamentos()
+        except GeoBoundariesError as e:
+            _geojson["fallo"] = (time.monotonic(), str(e))
+            raise
+        _geojson.clear()
+        _geojson["datos"] = geojson
+        return geojson
+
+
+def clear_cache():
+    with _lock:
+        _geojson.clear()
+
+
+def _descargar_departamentos():
+    if GEOJSON_CACHE.exists():
+        try:
+            with open(GEOJSON_CACHE, encoding="utf-8") as fh:
+                return json.load(fh)
+        except ValueError:
+            GEOJSON_CACHE.unlink(missing_ok=True)
+
+    try:
+        r = requests.get(GEOBOUNDARIES_URL, timeout=30)
+    except requests.RequestException as e:
+        raise GeoBoundariesError("⚠️ No se pudo obtener metadatos de GeoBoundaries.") from e
+    if r.status_code != 200:
+        raise GeoBoundariesError("⚠️ No se pudo obtener metadatos de GeoBoundaries.")
+    # Un 200 con otra cosa (p. ej. una página de mantenimiento) también es un fallo de GeoBoundaries
+    try:
+        url_geojson = r.json()["gjDownloadURL"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise GeoBoundariesError("⚠️ GeoBoundaries devolvió metadatos inesperados.") from e
+    try:
+        r2 = requests.get(url_geojson, timeout=60)
+    except requests.RequestException as e:
+        raise GeoBoundariesError("⚠️ No se pudo descargar el archivo GeoJSON desde GeoBoundaries.") from e
+    if r2.status_code != 200:
+        raise GeoBoundariesError("⚠️ No se pudo descargar el archivo GeoJSON desde GeoBoundaries.")
+    try:
+        geojson = r2.json()
+        geojson["features"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise GeoBoundariesError("⚠️ El archivo descargado de GeoBoundaries no es un GeoJSON válido.") from e
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = GEOJSON_CACHE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(geojson), encoding="utf-8")
+    tmp.replace(GEOJSON_CACHE)
+    return geojson
+
+
+# -------------------------------
+# Coordenadas aproximadas de municipios
+# -------------------------------
+coords_municipios = {
+    # 🔹 Huila
+    "Villavieja": [3.2189, -75.2189],
+    "Neiva": [2.9386, -75.2819],
+    "Garzón": [2.1953, -75.6275],
+    "Paicol": [2.4500, -75.7667],
+    "Yaguará": [2.6642, -75.5178],
+    "San Agustín": [1.8828, -76.2683],
+    "Pitalito": [1.8536, -76.0498],
+
+    # 🔹 Tolima
+    "Líbano": [4.9211, -75.0622],
+    "San Sebastián de Mariquita": [5.1989, -74.8944],
+    "Falan": [5.1175, -74.9517],
+    "Ibagué": [4.4389, -75.2322],
+    "Honda": [5.0713, -74.6949],
+    "Armero": [5.0300, -74.9000],
+    "Prado": [3.7500, -74.9167],
+
+    # 🔹 Putumayo
+    "Puerto Asís": [0.5052, -76.4951],
+    "Orito": [0.6781, -76.8723],
+    "Puerto Caicedo": [0.6953, -76.6044],
+    "Valle del Guamuez": [0.4519, -76.9292],
+    "Villagarzón": [0.9892, -76.6279],
+    "Mocoa": [1.1474, -76.6473],
+    "Sibundoy": [1.2081, -76.9220],
+    "Colón": [1.1900, -76.9740],
+    "Santiago": [1.1461, -77.0031],
+    "San Francisco": [1.1761, -76.8789],
+
+    # 🔹 Caquetá
+    "San Vicente del Caguán": [2.1167, -74.7667],
+    "Doncello": [1.6789, -75.2806],
+    "Florencia": [1.6144, -75.6062],
+    "San José del Fragua": [1.3300, -75.9700],
+    "Belén de los Andaquies": [1.4167, -75.8667],
+}
+
+# --- Relación de municipios por departamento ---
+municipios_por_departamento = {
+    "Huila": ["Villavieja", "Neiva", "Garzón", "Paicol", "Yaguará", "San Agustín", "Pitalito"],
+    "Tolima": ["Líbano", "San Sebastián de Mariquita", "Falan", "Ibagué", "Honda", "Armero", "Prado"],
+    "Putumayo": ["Puerto Asís", "Orito", "Puerto Caicedo", "Valle del Guamuez", "Villagarzón", "Mocoa", "Sibundoy", "Colón", "Santiago", "San Francisco"],
+    "Caquetá": ["San Vicente del Caguán", "Doncello", "Florencia", "San José del Fragua", "Belén de los Andaquies"],
+}
+
+
+def build_map(geojson_departamentos, departamentos):
+    """Mapa folium con los departamentos filtrados coloreados y sus municipios marcados."""
+    # Crear mapa
+    m = folium.Map(location=[2.5, -75.0], zoom_start=6, tiles="cartodbpositron")
+
+    # --- Colores para departamentos filtrados ---
+    colores = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#9B59B6", "#E67E22", "#1ABC9C"]
+    color_map = {depto: colores[i % len(colores)] for i, depto in enumerate(departamentos)}
+
+    # Dibujar departamentos y municipios
+    if geojson_departamentos:
+        for feature in geojson_departamentos["features"]:
+            nombre_depto = feature["properties"]["shapeName"]
+            if nombre_depto in departamentos:
+                folium.GeoJson(
+                    feature,
+                    name=nombre_depto,
+                    style_function=lambda f, nombre=nombre_depto: {
+                        "fillColor": color_map[nombre],
+                        "color": "black",
+                        "weight": 2,
+                        "fillOpacity": 0.5,
+                    },
+                    tooltip=folium.GeoJsonTooltip(fields=["shapeName"], aliases=["Departamento:"]),
+                ).add_to(m)
+
+                # --- Marcar municipios de ese departamento con el mismo color ---
+                municipios = municipios_por_departamento.get(nombre_depto, [])
+                for municipio in municipios:
+                    coords_mun = coords_municipios.get(municipio)
+                    if coords_mun:
+                        folium.Marker(
+                            location=coords_mun,
+                            popup=f"<b>{municipio}</b><br>Departamento: {nombre_depto}",
+                            tooltip=f"{municipio} ({nombre_depto})",
+                            icon=folium.Icon(color="blue", icon_color=color_map[nombre_depto], icon="", prefix="fa"),
+                        ).add_to(m)
+
+    return m
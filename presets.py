@@ -0,0 +1,256 @@
+# presets.py
+"""
+Presets de filtros con nombre: guardados en disco, compartibles por URL y precalculados.
+
+    presets.json   {"Huila cultural": {"Departamento": ["Huila"], "Enfoque Turístico": ["Cultural"]},
+                    "Seguridad vial": {"Aspecto": ["Seguridad"], "query": "vía"}}
+                   (mismo formato que `python reports.py --presets`)
+    URL            ?preset=Huila%20cultural, o los filtros sueltos:
+                   ?depto=Huila&enfoque=Cultural&sector=...&q=vía
+
+Para cada preset se precalculan las filas seleccionadas, las agregaciones de las
+pestañas, las figuras y el mapa renderizado. Se guardan en .cache/ por versión del
+dataset: solo se recalculan si cambia el Excel (o la definición del preset), así que
+abrir el enlace de un preset no filtra ni agrega nada.
+"""
+import json
+import pickle
+import threading
+from pathlib import Path
+from urllib.parse import urlencode
+
+import aggregations
+from dataset import BASE_DIR, CACHE_DIR, CACHE_VERSION
+from filters import FILTER_COLUMNS, available, filter_signature
+
+PRESETS_FILE = BASE_DIR / "presets.json"
+# Parámetro de la URL por columna del sidebar (también es la clave del widget en app.py)
+URL_PARAMS = {
+    "Departamento": "depto", "Municipio": "mpio", "Enfoque Turístico": "enfoque",
+    "Aspecto": "aspecto", "Sector": "sector",
+}
+QUERY_PARAM = "q"
+PRESET_PARAM = "preset"
+
+_lock = threading.Lock()
+_state = {}  # (backend, digest) -> {"entries": {nombre: entrada precalculada}, "warm": {(nombre, firma)}}
+_rows = {}   # (backend, firma de filtros) -> posiciones de las filas seleccionadas (backend pandas)
+
+
+class PresetsError(ValueError):
+    """Un archivo de presets que no es JSON válido o no tiene el formato esperado."""
+
+
+# ================== DISCO ==================
+def parse_presets(raw, origen="presets"):
+    """{nombre: {col: [valores], "query": texto}} -> {nombre: {"selections": {...}, "query": texto}}."""
+    if not isinstance(raw, dict):
+        raise PresetsError(f"{origen}: se esperaba un objeto {{nombre: filtros}}.")
+    presets = {}
+    for name, definicion in raw.items():
+        if not isinstance(definicion, dict):
+            raise PresetsError(f"{origen}: el preset «{name}» debe ser un objeto {{columna: [valores]}}.")
+        definicion = dict(definicion)
+        query = definicion.pop("query", "")
+        if not isinstance(query, str):
+            raise PresetsError(f"{origen}: \"query\" del preset «{name}» debe ser un texto.")
+        for col, vals in definicion.items():
+            # Un texto suelto no se acepta: list("Huila") serían sus letras
+            if not (isinstance(vals, list) and all(isinstance(v, str) for v in vals)):
+                raise PresetsError(f"{origen}: «{col}» del preset «{name}» debe ser una lista de textos.")
+        presets[name] = {"selections": {col: list(vals) for col, vals in definicion.items()}, "query": query}
+    return presets
+
+
+def load_presets(path=PRESETS_FILE):
+    """Presets de un archivo (por defecto presets.json); PresetsError si está mal formado."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise PresetsError(f"{path.name} no es un JSON válido (línea {e.lineno}, columna {e.colno}).") from e
+    return parse_presets(raw, path.name)
+
+
+def _write(presets, path):
+    raw = {
+        name: {**{col: vals for col, vals in p["selections"].items() if vals},
+               **({"query": p["query"]} if p["query"] else {})}
+        for name, p in sorted(presets.items())
+    }
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(raw, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def save_preset(name, selections, query="", path=PRESETS_FILE):
+    with _lock:
+        presets = load_presets(path)
+        presets[name] = {"selections": {col: list(v) for col, v in selections.items() if v}, "query": query}
+        _write(presets, path)
+
+
+def delete_preset(name, path=PRESETS_FILE):
+    with _lock:
+        presets = load_presets(path)
+        if presets.pop(name, None) is not None:
+            _write(presets, path)
+
+
+def spec(selections, query=""):
+    """Forma normalizada de unos filtros (para comparar presets con la selección actual)."""
+    return filter_signature(None, selections, query)[1:]
+
+
+def find_preset(presets, selections, query=""):
+    """Nombre del preset que equivale a estos filtros, o None."""
+    target = spec(selections, query)
+    return next((name for name, p in sorted(presets.items()) if spec(p["selections"], p["query"]) == target), None)
+
+
+# ================== URL ==================
+def to_query_params(selections, query="", name=None):
+    """{parámetro: valor o lista} para st.query_params (y el enlace para compartir)."""
+    params = {PRESET_PARAM: name} if name else {}
+    for col, key in URL_PARAMS.items():
+        if selections.get(col):
+            params[key] = list(selections[col])
+    if query:
+        params[QUERY_PARAM] = query
+    return params
+
+
+def from_query_params(query_params):
+    """(nombre de preset o None, selecciones, query) desde st.query_params."""
+    selections = {col: query_params.get_all(key) for col, key in URL_PARAMS.items()}
+    return query_params.get(PRESET_PARAM), selections, query_params.get(QUERY_PARAM, "")
+
+
+def share_link(params):
+    return "?" + urlencode(params, doseq=True)
+
+
+def sync_query_params(query_params, params):
+    """Deja en la URL exactamente `params` (los demás parámetros, p. ej. profiler, no se tocan)."""
+    for key in [PRESET_PARAM, QUERY_PARAM, *URL_PARAMS.values()]:
+        value = params.get(key)
+        if value is None:
+            if key in query_params:
+                del query_params[key]
+        elif query_params.get_all(key) != (value if isinstance(value, list) else [value]):
+            query_params[key] = value
+
+
+# ================== PRECÁLCULO ==================
+def preset_view(backend, preset):
+    vista = backend.view()
+    for col in FILTER_COLUMNS:
+        vista = vista.filter(col, preset["selections"].get(col))
+    return vista.search(preset["query"])
+
+
+def _compute(backend, preset, geojson):
+    """Entrada precalculada de un preset: firma, filas y resultados cacheados (agregaciones y mapa)."""
+    from render import map_html, map_key
+
+    vista = preset_view(backend, preset)
+    aggregations.default_aggregates(vista)
+    if available("Departamento", vista):
+        vista.nunique("Departamento")
+    dims = [d for d in aggregations.EXPLORER_DIMS if available(d, vista)]
+    resultados = aggregations.entries_for(vista.signature)
+    if dims and vista.count():
+        departamentos = vista.explore({dim: vista.distinct(dim) for dim in dims}).unique_in_order("Departamento")
+        resultados[map_key(geojson, departamentos)] = map_html(geojson, departamentos)
+    filas = backend.df.index.get_indexer(vista.df.index) if backend.name == "pandas" else None
+    return {"spec": spec(preset["selections"], preset["query"]), "firma": vista.signature,
+            "filas": filas, "resultados": resultados}
+
+
+def _warm_figures(backend, preset):
+    """Figuras de las pestañas (solo en memoria: no se guardan en disco)."""
+    from render import bar_chart, cached_figure, sentiment_pie
+
+    vista = precomputed_view(backend, preset["selections"], preset["query"]) or preset_view(backend, preset)
+    bar_cols = [c for c in aggregations.BAR_COLUMNS if available(c, vista)]
+    if bar_cols:
+        vc = vista.category(bar_cols[0], aggregations.BAR_TOP_N)
+        if not vc.empty:
+            cached_figure("barras", bar_cols[0], aggregations.BAR_TOP_N, vista.signature,
+                          lambda: bar_chart(vc, bar_cols[0]))
+    if available(aggregations.SENTIMENT_COL, vista):
+        counts = vista.sentiments()
+        cached_figure("sentimientos", aggregations.SENTIMENT_COL, None, vista.signature, lambda: sentiment_pie(counts))
+
+
+def _cache_path(backend):
+    return CACHE_DIR / f"presets-v{CACHE_VERSION}-{backend.name}-{backend.digest}.pkl"
+
+
+def _register(entry):
+    aggregations.seed(entry["resultados"])
+    if entry["filas"] is not None:
+        _rows[("pandas", entry["firma"])] = entry["filas"]
+
+
+def ensure_precomputed(backend, presets):
+    """
+    Garantiza que cada preset esté precalculado para esta versión del dataset: lo carga
+    de .cache/ o lo calcula (y lo guarda). Barato si no cambió nada desde la última llamada.
+    """
+    from geo import GeoBoundariesError, cargar_departamentos
+
+    key = (backend.name, backend.digest)
+    with _lock:
+        state = _state.get(key)
+        if state is None:
+            path = _cache_path(backend)
+            state = {"entries": {}, "warm": set()}
+            if path.exists():
+                try:
+                    with open(path, "rb") as fh:
+                        state["entries"] = pickle.load(fh)
+                    for entry in state["entries"].values():
+                        _register(entry)
+                except Exception:
+                    # Pickle truncado o de otra versión: se descarta y se recalcula abajo
+                    path.unlink(missing_ok=True)
+                    state["entries"] = {}
+            _state[key] = state
+
+        entries = state["entries"]
+        pendientes = [name for name, p in presets.items()
+                      if entries.get(name, {}).get("spec") != spec(p["selections"], p["query"])]
+        sobrantes = set(entries) - set(presets)
+        if pendientes:
+            try:
+                geojson = cargar_departamentos()
+            except GeoBoundariesError:
+                geojson = None
+            for name in pendientes:
+                entries[name] = _compute(backend, presets[name], geojson)
+                _register(entries[name])
+        for name in sobrantes:
+            del entries[name]
+        if pendientes or sobrantes:
+            CACHE_DIR.mkdir(exist_ok=True)
+            tmp = _cache_path(backend).with_suffix(".tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump(entries, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.replace(_cache_path(backend))
+
+        frios = [name for name in presets if (name, entries[name]["firma"]) not in state["warm"]]
+        state["warm"].update((name, entries[name]["firma"]) for name in frios)
+    for name in frios:
+        _warm_figures(backend, presets[name])
+    return entries
+
+
+def precomputed_view(backend, selections, query=""):
+    """Vista con las filas ya seleccionadas si estos filtros son los de un preset precalculado."""
+    filas = _rows.get((backend.name, filter_signature(backend.digest, selections, query)))
+    if filas is None:
+        return None
+    return backend.view_rows(filas, selections, query)
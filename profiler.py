@@ -0,0 +1,132 @@
+# profiler.py
+"""
+Instrumentación liviana por rerun: tiempo (y opcionalmente memoria) de cada etapa del script.
+
+Se usa con marcas de vuelta, sin reindentar el script:
+
+    prof = RerunProfiler()
+    ...                      # galería
+    prof.lap("galería")
+    ...                      # carga de datos
+    prof.lap("carga")
+    prof.finish(filas=len(df_f))
+
+Salidas opcionales, configuradas por variables de entorno:
+    VISUALIZADOR_PROFILE_JSONL   ruta de un archivo al que se agrega una línea JSON por rerun
+    VISUALIZADOR_PROFILE_PROM    ruta de un archivo de texto Prometheus (textfile collector)
+    VISUALIZADOR_PROFILE_MEMORY  "1" para medir deltas de memoria con tracemalloc
+    VISUALIZADOR_PROFILER        "1" para mostrar el panel de desarrollo (también ?profiler=1)
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+ENV_JSONL = "VISUALIZADOR_PROFILE_JSONL"
+ENV_PROM = "VISUALIZADOR_PROFILE_PROM"
+ENV_MEMORY = "VISUALIZADOR_PROFILE_MEMORY"
+ENV_PANEL = "VISUALIZADOR_PROFILER"
+
+# Acumulados del proceso para el archivo Prometheus (sumas y conteos por etapa)
+_totals = defaultdict(lambda: [0.0, 0])
+_reruns = [0]
+_lock = threading.Lock()
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RerunProfiler:
+    """Cronómetro de etapas de un rerun. Una instancia por ejecución del script."""
+
+    def __init__(self, track_memory=None, jsonl_path=None, prom_path=None):
+        self.track_memory = _env_flag(ENV_MEMORY) if track_memory is None else track_memory
+        self.jsonl_path = jsonl_path or os.environ.get(ENV_JSONL)
+        self.prom_path = prom_path or os.environ.get(ENV_PROM)
+        self.stages = []  # [(nombre, segundos, delta_kb | None)]
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._last = time.perf_counter()
+        self._mem_last = self._memory()
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory()[0] if self.track_memory else None
+
+    def lap(self, name):
+        """Cierra la etapa `name`: todo lo ejecutado desde la marca anterior."""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        mem = self._memory()
+        delta_kb = (mem - self._mem_last) / 1024 if mem is not None else None
+        self.stages.append((name, elapsed, delta_kb))
+        self._last, self._mem_last = now, mem
+        return elapsed
+
+    @property
+    def total(self):
+        return sum(secs for _, secs, _ in self.stages)
+
+    def as_records(self):
+        return [
+            {"etapa": name, "ms": round(secs * 1000, 2),
+             **({"mem_kb": round(kb, 1)} if kb is not None else {})}
+            for name, secs, kb in self.stages
+        ]
+
+    def finish(self, rerun=True, **extra):
+        """
+        Registra el rerun en las salidas configuradas y devuelve el registro JSON.
+        `rerun=False` para etapas fuera del script (p. ej. la descarga): no suman reruns.
+        """
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "total_ms": round(self.total * 1000, 2),
+            "etapas": self.as_records(),
+            **extra,
+        }
+        with _lock:
+            _reruns[0] += rerun
+            for name, secs, _ in self.stages:
+                _totals[name][0] += secs
+                _totals[name][1] += 1
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if self.prom_path:
+                write_prometheus(self.prom_path)
+        return record
+
+
+def _escape(label):
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_prometheus(path):
+    """Escribe los acumulados del proceso en formato de texto Prometheus (reemplazo atómico)."""
+    lines = [
+        "# HELP visualizador_stage_seconds Tiempo acumulado por etapa del script.",
+        "# TYPE visualizador_stage_seconds summary",
+    ]
+    for name, (secs, count) in sorted(_totals.items()):
+        lines.append(f'visualizador_stage_seconds_sum{{stage="{_escape(name)}"}} {secs:.6f}')
+        lines.append(f'visualizador_stage_seconds_count{{stage="{_escape(name)}"}} {count}')
+    lines += [
+        "# HELP visualizador_reruns_total Reruns instrumentados desde el arranque.",
+        "# TYPE visualizador_reruns_total counter",
+        f"visualizador_reruns_total {_reruns[0]}",
+    ]
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def panel_enabled(query_params=None):
+    if _env_flag(ENV_PANEL):
+        return True
+    return bool(query_params) and str(query_params.get("profiler", "")) == "1"
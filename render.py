@@ -0,0 +1,235 @@
+# render.py
+"""
+Presentación compartida entre la app (app.py) y los reportes estáticos (reports.py):
+estilo de tablas, gráficos Plotly de barras y sentimientos y campos de las tarjetas.
+
+Las figuras de la app se guardan en una caché LRU a nivel de proceso (cached_figure),
+con clave (tipo de gráfico, columna, Top N, firma de filtros): un rerun que solo
+cambia otro widget no vuelve a construirlas. Las figuras devueltas son compartidas:
+no modificarlas en el lugar.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+import aggregations
+from aggregations import SENTIMENT_COL
+from geo import build_map
+
+MAX_FIGURES = 64
+# Con más barras que esto se usa una traza liviana (ver bar_chart)
+LIGHT_MAX_BARS = 25
+
+_figures = OrderedDict()
+_huellas = OrderedDict()  # id(geojson) -> (geojson, huella); se guarda el objeto para que su id no se reutilice
+_lock = threading.Lock()
+
+# Colores personalizados según sentimiento
+SENTIMENT_COLORS = {
+    "Muy positivo": "#2ECC71",   # Verde fuerte
+    "Positivo": "#58D68D",       # Verde claro
+    "Neutro": "#B2BABB",         # Gris
+    "Negativo": "#E67E22",       # Naranja
+    "Muy negativo": "#E74C3C",   # Rojo
+}
+
+BADGE_COLUMNS = ["Departamento", "Municipio", "Enfoque Turístico", "Aspecto", "Sector", "Actor"]
+FUENTE_NOMBRE_COLS = ["Fuente", "Fuente / Autor", "Autor", "Autores", "Entidad", "Institución"]
+FUENTE_URL_COLS = ["Fuente_URL", "Fuente / Autor_URL", "Autor_URL", "Autores_URL", "Entidad_URL", "Institución_URL"]
+
+
+# Función de estilo reutilizable (sin highlight_max)
+def estilo_tabla(df):
+    return (
+        df.style
+        .set_properties(**{
+            "background-color": "#f9fafb",   # gris muy claro
+            "color": "#111827",              # texto oscuro
+            "border-color": "#e5e7eb",       # bordes suaves
+            "border-radius": "8px",          # esquinas redondeadas
+            "padding": "6px",                # espacio interno
+        })
+        .set_table_styles([
+            {"selector": "thead th", "props": [("background-color", "#3b82f6"),
+                                               ("color", "white"),
+                                               ("font-size", "14px"),
+                                               ("padding", "8px"),
+                                               ("text-align", "center")]},
+            {"selector": "tbody td", "props": [("font-size", "13px"),
+                                               ("text-align", "center")]}
+        ])
+    )
+
+
+def cached_figure(kind, col, top_n, signature, build):
+    """Devuelve la figura cacheada bajo (kind, col, top_n, signature) o la construye con `build()`."""
+    key = (kind, col, top_n, signature)
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+
+    fig = build()
+
+    with _lock:
+        _figures[key] = fig
+        while len(_figures) > MAX_FIGURES:
+            _figures.popitem(last=False)
+    return fig
+
+
+def _light_bar(vc, col_sel):
+    """
+    Barras para categorías con muchos valores (p. ej. Municipio en Top 50): un go.Bar
+    directo, sin etiquetas de texto ni bordes por barra, con el conteo en el hover.
+    Plotly no tiene barras WebGL; esta traza es la más liviana de construir y de enviar.
+    """
+    return go.Figure(go.Bar(
+        x=vc["Conteo"].tolist(),
+        y=vc[col_sel].tolist(),
+        orientation="h",
+        marker=dict(color=vc["Conteo"].tolist(), colorscale="plasma", showscale=True,
+                    colorbar=dict(title="Conteo")),
+        hovertemplate="%{y}: %{x}<extra></extra>",
+    ))
+
+
+def bar_chart(vc, col_sel):
+    """Barras horizontales de `vc` (columnas `col_sel` y Conteo), como en la pestaña Barras."""
+    if len(vc) > LIGHT_MAX_BARS:
+        fig = _light_bar(vc, col_sel)
+        fig.update_layout(
+            yaxis={"categoryorder": "total ascending"},
+            height=max(600, 18 * len(vc)),
+            margin=dict(l=10, r=10, t=30, b=10),
+            xaxis_title="Número de registros",
+            yaxis_title="",
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)",
+            font=dict(size=13)
+        )
+        return fig
+
+    fig = px.bar(
+        vc,
+        x="Conteo",
+        y=col_sel,
+        orientation="h",
+        text="Conteo",
+        color="Conteo",
+        color_continuous_scale="plasma"  # gradiente bonito
+    )
+
+    fig.update_traces(
+        texttemplate="%{text}",
+        textposition="outside",
+        marker=dict(line=dict(width=0.5, color="white"))
+    )
+
+    fig.update_layout(
+        yaxis={"categoryorder": "total ascending"},
+        height=600,
+        margin=dict(l=10, r=10, t=30, b=10),
+        xaxis_title="Número de registros",
+        yaxis_title="",
+        plot_bgcolor="rgba(0,0,0,0)",  # fondo transparente
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(size=13)
+    )
+    return fig
+
+
+def sentiment_pie(sentiment_counts):
+    """Gráfico circular de la distribución de sentimientos."""
+    fig_pie = px.pie(
+        sentiment_counts,
+        names=SENTIMENT_COL,
+        values="Conteo",
+        color=SENTIMENT_COL,
+        color_discrete_map=SENTIMENT_COLORS,
+        hole=0.3,
+        title="Distribución porcentual de sentimientos"
+    )
+    fig_pie.update_traces(
+        textposition="inside",
+        textinfo="percent+label",
+        pull=[0.05] * len(sentiment_counts)
+    )
+    return fig_pie
+
+
+def geojson_fingerprint(geojson):
+    """Hash corto del contenido del GeoJSON (calculado una vez por objeto), o None sin límites."""
+    if geojson is None:
+        return None
+    with _lock:
+        hit = _huellas.get(id(geojson))
+        if hit is not None and hit[0] is geojson:
+            return hit[1]
+    huella = hashlib.sha256(json.dumps(geojson, sort_keys=True).encode()).hexdigest()[:16]
+    with _lock:
+        _huellas[id(geojson)] = (geojson, huella)
+        while len(_huellas) > 4:
+            _huellas.popitem(last=False)
+    return huella
+
+
+def map_key(geojson, departamentos):
+    # Con la huella de los límites: un mapa hecho con otro GeoJSON no se reutiliza
+    return ("mapa", tuple(departamentos), geojson_fingerprint(geojson))
+
+
+def map_html(geojson, departamentos):
+    """
+    HTML completo del mapa folium de `departamentos`, renderizado una sola vez por proceso
+    (caché compartida de aggregations) y mostrado con st.iframe. Renderizar es lo costoso;
+    un folium.Map no se puede reutilizar entre reruns con st_folium, que duplica el JS.
+    """
+    return aggregations.memoize(map_key(geojson, departamentos),
+                                lambda: build_map(geojson, list(departamentos)).get_root().render())
+
+
+def _first_present(row, cols):
+    for c in cols:
+        if c in row and str(row.get(c)).strip() not in ["", "nan", "None"]:
+            return str(row.get(c)).strip()
+    return ""
+
+
+def card_fields(row, i):
+    """Contenido de la tarjeta de un registro: título, badges, textos y fuente (con URL)."""
+    title = row.get("Título") or row.get("Titulo") or row.get("Nombre") or f"Registro {i}"
+
+    badges = []
+    for b in BADGE_COLUMNS:
+        v = row.get(b)
+        if v and str(v).strip():
+            badges.append((b, v))
+
+    fuente_nombre = _first_present(row, FUENTE_NOMBRE_COLS)
+    fuente_url = _first_present(row, FUENTE_URL_COLS)
+    if fuente_url and not fuente_url.lower().startswith(("http://", "https://")):
+        fuente_url = "https://" + fuente_url
+
+    return {
+        "title": title,
+        "badges": badges,
+        "desc": (row.get("Descripción") or "").strip(),
+        "aporte": (row.get("Aporte a la Investigación") or "").strip(),
+        "fuente_nombre": fuente_nombre,
+        "fuente_url": fuente_url,
+    }
+
+
+def badges_html(badges):
+    return " ".join(f'<span class="badge">{b}: {v}</span>' for b, v in badges)
+
+
+def fuente_html(fuente_nombre, fuente_url):
+    if fuente_url:
+        return f'<p><a href="{fuente_url}" target="_blank" rel="noopener noreferrer">{fuente_nombre or fuente_url}</a></p>'
+    return f"<p>{fuente_nombre}</p>"
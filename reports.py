@@ -0,0 +1,345 @@
+# reports.py
+"""
+Reportes HTML estáticos por departamento y preset de filtros, sin abrir la app.
+
+Cada reporte trae los Top 5 del resumen, las barras por categoría, la distribución
+de sentimientos, el mapa y las tarjetas, con las mismas agregaciones (backends.py)
+y los mismos gráficos y tarjetas (render.py) que la app. Los reportes se generan
+en paralelo en un pool de procesos; los que tienen el mismo hash de datos de
+entrada que en la corrida anterior (reportes/manifest.json) se omiten.
+
+Un preset es un nombre con selecciones del sidebar y, opcionalmente, un texto de búsqueda:
+
+    {"cultural": {"Enfoque Turístico": ["Cultural"]},
+     "seguridad": {"Aspecto": ["Seguridad"], "query": "vía"}}
+
+Uso:
+    python reports.py                                  # todos los departamentos: sin filtros y presets guardados
+    python reports.py --presets presets.json -o reportes --workers 4
+    python reports.py --departamentos Huila Tolima --force
+"""
+import argparse
+import hashlib
+import html
+import json
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+import pandas as pd
+
+from aggregations import BAR_TOP_N, RANKING_N, RANKINGS
+from dataset import BASE_DIR, DEFAULT_FILE, VALID_SHEETS
+
+# Subir al cambiar la plantilla o el contenido de los reportes para regenerarlos todos
+REPORT_VERSION = 1
+OUTPUT_DIR = BASE_DIR / "reportes"
+MANIFEST = "manifest.json"
+DEFAULT_PRESETS = {"completo": {}}
+
+# Sin Departamento: cada reporte es de un solo departamento
+BAR_COLUMNS = ["Aspecto", "Enfoque Turístico", "Municipio", "Sector"]
+MAX_CARDS = 50
+
+CSS = """
+body { font-family: 'Poppins', sans-serif; background-color: #f9fdfb; color: #154734; margin: 0 auto; max-width: 1100px; padding: 24px; }
+h1, h2 { color: #106c5d; }
+h2 { border-bottom: 3px solid #3fb4a1; padding-bottom: 4px; margin-top: 36px; }
+.kpis { display: flex; gap: 16px; }
+.kpi-card { background: #e9fdf9; border-radius: 14px; padding: 12px 24px; box-shadow: 0 2px 6px rgba(63,180,161,0.15); }
+.kpi-title { margin: 0; font-size: 14px; } .kpi-value { margin: 0; font-size: 28px; font-weight: 700; }
+.rankings { display: flex; gap: 32px; flex-wrap: wrap; }
+.card { background: #ffffff; border-radius: 12px; padding: 12px 18px; margin: 12px 0; border-left: 5px solid #3fb4a1; }
+.badge { display: inline-block; background: #e9fdf9; border-radius: 10px; padding: 2px 8px; margin: 2px; font-size: 12px; }
+.filtros { color: #4b5563; font-size: 14px; }
+iframe { border: none; width: 100%; height: 600px; }
+"""
+
+
+def slug(text):
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "x"
+
+
+def load_presets(path=None):
+    """
+    {nombre: {"selections": {col: [valores]}, "query": str}}: los de un JSON si se indica,
+    si no el reporte sin filtros más los presets guardados desde la app (presets.json).
+    """
+    from presets import PresetsError, load_presets as saved_presets, parse_presets
+
+    if path:
+        if not Path(path).exists():
+            raise PresetsError(f"No existe el archivo de presets: {path}")
+        return saved_presets(path)
+    try:
+        guardados = saved_presets()
+    except PresetsError as e:
+        print(f"⚠️ {e} Se generan solo los reportes sin filtros.", file=sys.stderr)
+        guardados = {}
+    return {**parse_presets(DEFAULT_PRESETS), **guardados}
+
+
+def report_view(backend, departamento, preset):
+    """Vista del backend con el departamento, las selecciones del preset y su búsqueda."""
+    vista = backend.view().filter("Departamento", [departamento])
+    for col, sel in preset["selections"].items():
+        if col != "Departamento":
+            vista = vista.filter(col, sel)
+    return vista.search(preset["query"])
+
+
+def input_hash(vista, con_mapa, plotlyjs):
+    """Hash de lo que entra al reporte: filas filtradas, mapa, modo de Plotly y versión de la plantilla."""
+    df = vista.to_frame()
+    h = hashlib.sha256(f"v{REPORT_VERSION}|mapa={con_mapa}|js={plotlyjs}|".encode())
+    h.update("|".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+# ================== RENDER ==================
+def _table_html(df):
+    from render import estilo_tabla
+
+    return estilo_tabla(df).hide(axis="index").to_html()
+
+
+def _figure_html(fig, plotlyjs):
+    return fig.to_html(full_html=False, include_plotlyjs=plotlyjs, config={"displaylogo": False})
+
+
+def _cards_html(df):
+    from render import badges_html, card_fields, fuente_html
+
+    partes = []
+    for i, row in df.iterrows():
+        tarjeta = card_fields(row, i)
+        partes.append('<div class="card">')
+        partes.append(f"<h4>{tarjeta['title']}</h4>")
+        if tarjeta["badges"]:
+            partes.append(badges_html(tarjeta["badges"]))
+        if tarjeta["desc"]:
+            partes.append(f"<h5>Descripción</h5><p>{tarjeta['desc']}</p>")
+        if tarjeta["aporte"]:
+            partes.append(f"<h5>Aporte a la investigación</h5><p>{tarjeta['aporte']}</p>")
+        if tarjeta["fuente_nombre"] or tarjeta["fuente_url"]:
+            partes.append("<h5>Fuente</h5>" + fuente_html(tarjeta["fuente_nombre"], tarjeta["fuente_url"]))
+        partes.append("</div>")
+    return "\n".join(partes)
+
+
+def render_report(vista, departamento, preset_name, preset, geojson, plotlyjs="inline"):
+    """HTML completo de un reporte (Plotly embebido salvo `plotlyjs="cdn"`)."""
+    from filters import available
+    from render import bar_chart, map_html, sentiment_pie
+
+    n_filas = vista.count()
+    js = [True if plotlyjs == "inline" else "cdn"]
+
+    def figure(fig):
+        out = _figure_html(fig, js[0])
+        js[0] = False  # la librería solo se incluye una vez por archivo
+        return out
+
+    # El departamento ya va en el título; las demás selecciones son los filtros del reporte
+    filtros = [f"{col}: {', '.join(map(str, sel))}" for col, sel in preset["selections"].items()
+               if sel and col != "Departamento"]
+    if preset["query"]:
+        filtros.append(f"búsqueda: “{preset['query']}”")
+    body = [
+        f"<h1>📊 {html.escape(departamento)} · {html.escape(preset_name)}</h1>",
+        f'<p class="filtros">{html.escape(" · ".join(filtros) or "Sin filtros adicionales")} — generado '
+        f'{datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC</p>',
+        '<div class="kpis">'
+        f'<div class="kpi-card"><p class="kpi-title">Registros</p><p class="kpi-value">{n_filas:,}</p></div>'
+        + (f'<div class="kpi-card"><p class="kpi-title">Municipios</p><p class="kpi-value">{vista.nunique("Municipio"):,}</p></div>'
+           if available("Municipio", vista) else "")
+        + "</div>",
+    ]
+
+    if n_filas == 0:
+        body.append("<p>No hay registros con estos filtros.</p>")
+    else:
+        # --- Resumen ---
+        body.append('<h2>📌 Resumen</h2><div class="rankings">')
+        for col, titulo in RANKINGS:
+            top = vista.top(col, RANKING_N) if available(col, vista) else None
+            if top is not None and not top.empty:
+                body.append(f"<div><h3>{titulo}</h3>{_table_html(top)}</div>")
+        body.append("</div>")
+
+        # --- Barras ---
+        body.append("<h2>📊 Comparación por categorías</h2>")
+        for col in [c for c in BAR_COLUMNS if available(c, vista)]:
+            vc = vista.category(col, BAR_TOP_N)
+            if not vc.empty:
+                body.append(f"<h3>{col} (Top {BAR_TOP_N})</h3>" + figure(bar_chart(vc, col)))
+
+        # --- Sentimientos ---
+        if available("Sentimiento identificado", vista):
+            sentiment_counts = vista.sentiments()
+            body.append("<h2>💬 Distribución de sentimientos</h2>")
+            body.append(_table_html(sentiment_counts) + figure(sentiment_pie(sentiment_counts)))
+
+        # --- Mapa ---
+        body.append("<h2>🗺️ Mapa</h2>")
+        if geojson is None:
+            body.append("<p>Límites de GeoBoundaries no disponibles al generar el reporte.</p>")
+        mapa = map_html(geojson, vista.unique_in_order("Departamento"))
+        body.append(f'<iframe srcdoc="{html.escape(mapa)}"></iframe>')
+
+        # --- Tarjetas ---
+        body.append(f"<h2>🗂️ Registros (primeros {min(n_filas, MAX_CARDS)} de {n_filas:,})</h2>")
+        body.append(_cards_html(vista.head(MAX_CARDS)))
+
+    return (
+        "<!DOCTYPE html>\n<html lang=\"es\"><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(departamento)} · {html.escape(preset_name)}</title>"
+        f"<style>{CSS}</style></head><body>\n" + "\n".join(body) + "\n</body></html>\n"
+    )
+
+
+# ================== POOL ==================
+_worker = {}
+
+
+def _init_worker(backend_name, con_mapa):
+    import logging
+
+    from backends import get_backend
+    from geo import GeoBoundariesError, cargar_departamentos
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    _worker["backend"] = get_backend(backend_name, DEFAULT_FILE, VALID_SHEETS)
+    _worker["geojson"] = None
+    if con_mapa:
+        try:
+            _worker["geojson"] = cargar_departamentos()  # caché en disco escrita por el proceso principal
+        except GeoBoundariesError:
+            pass
+
+
+def _render_job(job):
+    """Genera y escribe un reporte en el proceso trabajador. Devuelve (archivo, segundos)."""
+    t0 = time.perf_counter()
+    vista = report_view(_worker["backend"], job["departamento"], job["preset"])
+    contenido = render_report(vista, job["departamento"], job["preset_name"], job["preset"],
+                              _worker["geojson"], job["plotlyjs"])
+    path = Path(job["path"])
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(contenido, encoding="utf-8")
+    tmp.replace(path)
+    return job["archivo"], time.perf_counter() - t0
+
+
+def _write_index(out_dir, manifest):
+    filas = "\n".join(
+        f'<li><a href="{html.escape(archivo)}">{html.escape(info["departamento"])} · '
+        f'{html.escape(info["preset"])}</a> — {info["filas"]:,} registros</li>'
+        for archivo, info in sorted(manifest.items())
+    )
+    (out_dir / "index.html").write_text(
+        f'<!DOCTYPE html>\n<html lang="es"><head><meta charset="utf-8"><title>Reportes</title>'
+        f"<style>{CSS}</style></head><body><h1>Reportes por departamento</h1><ul>\n{filas}\n</ul></body></html>\n",
+        encoding="utf-8",
+    )
+
+
+def generate_reports(out_dir=OUTPUT_DIR, departamentos=None, presets=None, workers=None,
+                     force=False, plotlyjs="inline", backend_name=None, log=print):
+    """Genera los reportes que cambiaron. Devuelve {"generados": [...], "omitidos": [...]}."""
+    from backends import get_backend
+    from geo import GeoBoundariesError, cargar_departamentos
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    presets = presets or load_presets()
+    backend = get_backend(backend_name, DEFAULT_FILE, VALID_SHEETS)
+    departamentos = departamentos or backend.options("Departamento")
+
+    try:
+        cargar_departamentos()
+        con_mapa = True
+    except GeoBoundariesError as e:
+        log(f"{e} Los mapas saldrán sin límites departamentales.")
+        con_mapa = False
+
+    manifest_path = out_dir / MANIFEST
+    anterior = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    manifest, pendientes, omitidos, descartados = {}, [], [], set()
+    for depto in departamentos:
+        for preset_name, preset in presets.items():
+            archivo = f"{slug(depto)}__{slug(preset_name)}.html"
+            # Un preset que fija Departamento solo produce reportes de esos departamentos
+            fijados = preset["selections"].get("Departamento")
+            if fijados and depto not in fijados:
+                descartados.add(archivo)
+                continue
+            vista = report_view(backend, depto, preset)
+            digest = input_hash(vista, con_mapa, plotlyjs)
+            manifest[archivo] = {"departamento": depto, "preset": preset_name, "hash": digest,
+                                 "filas": vista.count()}
+            previo = anterior.get(archivo, {})
+            if not force and previo.get("hash") == digest and (out_dir / archivo).exists():
+                manifest[archivo]["generado"] = previo.get("generado")
+                omitidos.append(archivo)
+                continue
+            pendientes.append({"archivo": archivo, "path": str(out_dir / archivo), "departamento": depto,
+                               "preset_name": preset_name, "preset": preset, "plotlyjs": plotlyjs})
+
+    generados = []
+    if pendientes:
+        ctx = get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or min(len(pendientes), 4), mp_context=ctx,
+                                 initializer=_init_worker, initargs=(backend.name, con_mapa)) as pool:
+            futures = [pool.submit(_render_job, job) for job in pendientes]
+            for future in as_completed(futures):
+                archivo, secs = future.result()
+                manifest[archivo]["generado"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                generados.append(archivo)
+                log(f"✅ {archivo:<45} {secs:6.2f} s")
+    for archivo in omitidos:
+        log(f"⏭️ {archivo:<45} sin cambios")
+
+    # Un reporte de un departamento que el preset ya no incluye no debe seguir publicado
+    for archivo in descartados:
+        (out_dir / archivo).unlink(missing_ok=True)
+    # Una corrida parcial (p. ej. --departamentos Huila) conserva los reportes de las demás
+    manifest = {archivo: info for archivo, info in {**anterior, **manifest}.items() if (out_dir / archivo).exists()}
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_index(out_dir, manifest)
+    return {"generados": sorted(generados), "omitidos": omitidos}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera reportes HTML estáticos por departamento y preset.")
+    parser.add_argument("-o", "--output", default=str(OUTPUT_DIR), help="carpeta de salida")
+    parser.add_argument("--departamentos", nargs="+", help="por defecto, todos los del consolidado")
+    parser.add_argument("--presets", help="JSON con {nombre: {columna: [valores], \"query\": texto}}")
+    parser.add_argument("--workers", type=int, help="procesos en paralelo (por defecto hasta 4)")
+    parser.add_argument("--force", action="store_true", help="regenerar aunque los datos no hayan cambiado")
+    parser.add_argument("--plotlyjs", choices=["inline", "cdn"], default="inline",
+                        help="incluir plotly.js en cada archivo (autocontenido) o cargarlo de la CDN")
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], help="por defecto, VISUALIZADOR_BACKEND")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    try:
+        resultado = generate_reports(args.output, args.departamentos, load_presets(args.presets),
+                                     args.workers, args.force, args.plotlyjs, args.backend)
+    except ValueError as e:  # ninguna hoja válida en el Excel o un --presets mal formado
+        print(f"❌ {e}")
+        return 1
+    print(f"\n{len(resultado['generados'])} generados, {len(resultado['omitidos'])} sin cambios "
+          f"en {time.perf_counter() - t0:.1f} s → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# tests/test_backends.py
+"""Los backends pandas y DuckDB deben dar los mismos resultados para las mismas vistas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from backends import DuckDBBackend, PandasBackend  # noqa: E402
+from benchmarks.synthetic import generate_frame  # noqa: E402
+from dataset import normalize_columns  # noqa: E402
+
+ROWS = 2_000
+# (selecciones del sidebar, búsqueda por texto)
+CASOS = [
+    ({}, ""),
+    ({"Departamento": ["Huila", "Tolima"]}, ""),
+    ({"Aspecto": ["Seguridad"], "Enfoque Turístico": ["Cultural", "Aventura"]}, ""),
+    ({"Municipio": ["Neiva"]}, ""),
+    ({}, "cascada"),
+    ({}, "hotel|río"),
+    ({}, "(hotel"),
+    ({}, "(?=hotel)"),
+    ({"Departamento": ["Caquetá"]}, "Turismo"),
+    ({"Departamento": ["Putumayo"], "Aspecto": ["Otro"]}, "zzzz"),
+]
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    df = normalize_columns(generate_frame(ROWS, seed=7))
+    # Municipio con nulos y espacios sobrantes, como en el consolidado real
+    rng = np.random.default_rng(7)
+    df["Municipio"] = rng.choice(np.array(["Neiva", " Garzón ", "Mocoa", None], dtype=object), len(df))
+    digest = "prueba-backends"
+    return (PandasBackend.from_frame(df, digest),
+            DuckDBBackend.from_frame(df, digest, tmp_path_factory.mktemp("duckdb")))
+
+
+def _vista(backend, selections, query):
+    vista = backend.view()
+    for col, sel in selections.items():
+        vista = vista.filter(col, sel)
+    return vista.search(query)
+
+
+def _igual(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True),
+                                  check_dtype=False, check_column_type=False)
+
+
+@pytest.mark.parametrize("selections, query", CASOS)
+def test_backends_coinciden(backends, selections, query):
+    pandas_view, duckdb_view = (_vista(b, selections, query) for b in backends)
+
+    assert pandas_view.count() == duckdb_view.count()
+    assert backends[0].preview_count(selections, query) == backends[1].preview_count(selections, query)
+    assert pandas_view.count() == backends[0].preview_count(selections, query)
+    for col in ["Departamento", "Municipio"]:
+        assert pandas_view.unique_in_order(col) == duckdb_view.unique_in_order(col)
+    for col in ["Aspecto", "Enfoque Turístico"]:
+        _igual(pandas_view.top(col, 5), duckdb_view.top(col, 5))
+    for col in ["Aspecto", "Municipio"]:
+        _igual(pandas_view.category(col, 20), duckdb_view.category(col, 20))
+    _igual(pandas_view.summary(["Departamento", "Aspecto"]), duckdb_view.summary(["Departamento", "Aspecto"]))
+    _igual(pandas_view.sentiments(), duckdb_view.sentiments())
+    for offset, limit in [(0, 50), (37, 10)]:
+        _igual(pandas_view.rows(offset, limit).astype(str), duckdb_view.rows(offset, limit).astype(str))
@@ -0,0 +1,114 @@
+# warmup.py
+"""
+Precalienta las cachés pesadas antes de la primera sesión.
+
+Etapas (en paralelo): lectura del Excel + agregaciones por defecto y presets
+guardados, GeoJSON de GeoBoundaries, miniaturas de la galería e importación de
+Plotly/folium.
+
+Uso:
+    python warmup.py                 # llena las cachés en disco (.cache/) y sale
+    python warmup.py --serve [-- <opciones de streamlit>]
+                                     # precalienta y arranca `streamlit run app.py`
+                                     # en el mismo proceso (cachés en memoria ya llenas)
+    python warmup.py --serve --api   # además, la API de consultas (api.py) en ese proceso
+"""
+import argparse
+import importlib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset import BASE_DIR, DEFAULT_FILE, VALID_SHEETS
+
+
+def _stage_dataset():
+    import aggregations
+    from backends import get_backend
+    from presets import ensure_precomputed, load_presets
+
+    backend = get_backend(file=DEFAULT_FILE, valid_sheets=VALID_SHEETS)
+    filas = aggregations.default_aggregates(backend.view())
+    presets = ensure_precomputed(backend, load_presets())
+    return f"{filas:,} filas ({backend.name}), {len(presets)} presets"
+
+
+def _stage_geo():
+    from geo import cargar_departamentos
+
+    return f"{len(cargar_departamentos()['features'])} departamentos"
+
+
+def _stage_thumbnails():
+    import gallery
+
+    imagenes = gallery.list_images() if gallery.CARPETA_IMAGENES.exists() else []
+    for img_path in imagenes:
+        gallery.thumbnail(img_path)
+    return f"{len(imagenes)} miniaturas"
+
+
+def _stage_imports():
+    for mod in ("plotly.express", "folium"):
+        importlib.import_module(mod)
+    return "plotly, folium"
+
+
+STAGES = {
+    "dataset + agregaciones": _stage_dataset,
+    "límites GeoBoundaries": _stage_geo,
+    "miniaturas galería": _stage_thumbnails,
+    "imports Plotly/folium": _stage_imports,
+}
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    try:
+        detail, ok = fn(), True
+    except Exception as e:  # una etapa fallida no debe impedir las demás
+        detail, ok = f"{type(e).__name__}: {e}", False
+    return ok, time.perf_counter() - t0, detail
+
+
+def warm_up(stages=STAGES, report=print):
+    """Ejecuta las etapas en paralelo y devuelve {etapa: (ok, segundos, detalle)}."""
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(stages)) as pool:
+        futures = {name: pool.submit(_timed, fn) for name, fn in stages.items()}
+        results = {name: fut.result() for name, fut in futures.items()}
+
+    for name, (ok, secs, detail) in results.items():
+        report(f"{'✅' if ok else '❌'} {name:<24} {secs:7.2f} s  {detail}")
+    report(f"   {'total':<24} {time.perf_counter() - t0:7.2f} s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--serve", action="store_true",
+                        help="arranca Streamlit en este proceso al terminar el precalentamiento")
+    parser.add_argument("--api", action="store_true",
+                        help="con --serve, levanta también la API de consultas (api.py) en este proceso")
+    parser.add_argument("--api-port", type=int, default=None, help="puerto de la API (por defecto 8502)")
+    parser.add_argument("streamlit_args", nargs="*",
+                        help="opciones extra para `streamlit run` (después de --)")
+    args = parser.parse_args(argv)
+
+    results = warm_up()
+
+    if args.serve:
+        from streamlit.web import cli as stcli
+
+        if args.api:
+            import api
+
+            server = api.serve_in_background(port=args.api_port or api.DEFAULT_PORT)
+            print(f"API de consultas en http://{server.server_address[0]}:{server.server_address[1]}/")
+        sys.argv = ["streamlit", "run", str(BASE_DIR / "app.py"), *args.streamlit_args]
+        return stcli.main()
+    return 0 if all(ok for ok, _, _ in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())